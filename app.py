@@ -87,8 +87,14 @@ class AppConfig:
     
     # Output settings
     output_dir: str = os.getenv('OUTPUT_DIR', 'outputs')
+    # Export mode: comma-separated subset of projects_json,companies_json,excel (empty = default set)
+    export_formats: str = os.getenv('EXPORT_FORMATS', '')
+    # Export mode: explicit projects_processed_*.json to re-export (empty = latest)
+    export_source: str = os.getenv('EXPORT_SOURCE', '')
     # Geocoding toggles
     enable_geocoding: bool = os.getenv('ENABLE_GEOCODING', 'true').lower() == 'true'
+    # Scraper fallback: >1 shards the scrape of GIDs without API data across processes (0 = one per CPU core)
+    scraper_processes: int = int(os.getenv('SCRAPER_PROCESSES', '1'))
     
     def __post_init__(self):
         """Validate configuration and set mode-specific defaults."""
@@ -265,18 +271,31 @@ class Application:
             return {"status": "error", "error": str(e)}
     
     def run_export(self, projects: list = None) -> dict:
-        """Export processed data to various formats."""
+        """
+        Export processed data to various formats.
+        Without explicit projects, reloads the latest saved projects file so
+        outputs can be regenerated without re-running discovery/assembly.
+        """
         logger.info("Starting data export phase")
         
         try:
             from core.storage import ProjectStorage
             
             storage = ProjectStorage(self.config)
+            formats = [f for f in self.config.export_formats.split(',') if f.strip()] or None
             
-            if projects:
-                results = storage.export_all(projects)
-            else:
-                results = storage.export_all([])  # Empty list for now
+            if not projects:
+                source = self.config.export_source or storage.find_latest_projects_file()
+                if not source:
+                    return {"status": "error", "error": "no processed projects file found"}
+                projects = storage.load_projects(source)
+                if not projects:
+                    return {"status": "error", "error": f"no projects loaded from {source}"}
+                if formats is None:
+                    # Re-saving the source file would only duplicate it
+                    formats = ['companies_json', 'excel']
+            
+            results = storage.export_all(projects, formats=formats)
             
             logger.info("Data export completed", extra=results)
             return {"status": "success", **results}
@@ -13,9 +13,13 @@ from datetime import datetime
 import time
 
 from .models import Project, Company, CompanyRelationship, ProjectLocation, DataSource, ProcessingStage, ProcessingMetrics, RelationshipType
+from services.dead_letter import DeadLetterQueue, ScrapeDeferred, NO_DATA, classify_failure, is_retryable
 
 logger = logging.getLogger(__name__)
 
+# Map-center goto/ready/overall timeout; deferred retries double it
+MAP_CENTER_TIMEOUT_MS = 7000
+
 
 @dataclass
 class AssemblyResult:
@@ -248,6 +252,12 @@ class ProjectAssembler:
         # Load project URLs for URL mapping
         self.project_urls = self._load_project_urls()
         
+        # Map-center lookups deferred during the current batch (retried without re-scraping)
+        self._map_letters: Optional[DeadLetterQueue] = None
+        # Scraper fallback: worker processes for the batch prefetch (1 = scrape per project in-process)
+        self.scraper_processes = int(getattr(config, 'scraper_processes', 1))
+        self._prefetched: Dict[str, Any] = {}
+        
         # Create GID to country mapping for efficient API calls
         self.gid_to_country_cache = {}
         self._preload_api_data()
@@ -270,8 +280,11 @@ class ProjectAssembler:
         result = AssemblyResult()
         
         try:
-            # Process projects concurrently
+            # Process projects concurrently; failures are deferred, not counted yet
             max_workers = min(4, len(gids)) if len(gids) > 0 else 1
+            dead_letters = DeadLetterQueue()
+            self._map_letters = DeadLetterQueue()
+            self._prefetch_scraped(gids)
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 future_to_gid = {executor.submit(self._process_single_project, gid): gid for gid in gids}
                 for future in as_completed(future_to_gid):
@@ -279,24 +292,19 @@ class ProjectAssembler:
                     try:
                         project = future.result()
                         if project:
-                            result.projects.append(project)
-                            result.completed += 1
-                            self.metrics.completed_projects += 1
-                            
-                            if project.primary_company and project.primary_company.data_source == DataSource.RELATIONSHIPS:
-                                self.metrics.relationships_enriched += 1
-                            if DataSource.API in project.data_sources:
-                                self.metrics.api_projects += 1
+                            self._record_completed(project, result)
                         else:
-                            result.failed += 1
-                            result.errors.append(f"Failed to process project {gid}")
-                            self.metrics.failed_projects += 1
+                            dead_letters.add(gid, NO_DATA)
                     except Exception as e:
-                        logger.error(f"Error processing {gid}: {e}")
-                        result.failed += 1
-                        result.errors.append(f"Error processing {gid}: {str(e)}")
-                        self.metrics.failed_projects += 1
-                        self.metrics.add_error("processing_error")
+                        logger.warning(f"Deferring {gid} after error: {e}")
+                        dead_letters.add(gid, classify_failure(e), e)
+            
+            # Deferred retry: one more attempt per failed GID at lower concurrency
+            self._retry_dead_letters(dead_letters, result, max_workers=max(1, max_workers // 2))
+            self._retry_map_centers(result, max_workers=max(1, max_workers // 2))
+            
+            # Geocoding stage: deduplicated lookups for the whole batch
+            result.projects = self._enrich_locations(result.projects)
             
             self.metrics.end_time = datetime.now()
             
@@ -314,15 +322,140 @@ class ProjectAssembler:
             result.errors.append(f"Batch processing failed: {str(e)}")
             return result
     
-    def _process_single_project(self, gid: str) -> Optional[Project]:
+    def _prefetch_scraped(self, gids: List[str]) -> None:
+        """
+        With scraper_processes != 1, scrape every GID that has no API data in one
+        sharded run (scrape_many_sharded) before assembly starts. GIDs it could not
+        scrape fall back to per-project scraping and the dead-letter retry.
+        """
+        self._prefetched = {}
+        missing = [str(g) for g in gids if not self.gid_to_country_cache.get(str(g))]
+        if self.scraper_processes == 1 or len(missing) < 2:
+            return
+        from services.playwright_parallel_scraper import PlaywrightParallelScraper
+        try:
+            records = PlaywrightParallelScraper().scrape_many_sharded(
+                missing, processes=self.scraper_processes or None,
+                headless=(os.getenv('SCRAPER_HEADFUL', 'false').lower() != 'true'), verbose=False)
+        except Exception as e:
+            logger.warning(f"Sharded scraper prefetch failed, scraping per project: {e}")
+            return
+        self._prefetched = {str(r.gid): r for r in records}
+        logger.info(f"Prefetched {len(self._prefetched)}/{len(missing)} projects with the sharded scraper")
+    
+    def _record_completed(self, project: Project, result: AssemblyResult) -> None:
+        result.projects.append(project)
+        result.completed += 1
+        self.metrics.completed_projects += 1
+        
+        if project.primary_company and project.primary_company.data_source == DataSource.RELATIONSHIPS:
+            self.metrics.relationships_enriched += 1
+        if DataSource.API in project.data_sources:
+            self.metrics.api_projects += 1
+    
+    def _record_failed(self, gid: str, reason: str, error: Any, result: AssemblyResult) -> None:
+        result.failed += 1
+        self.metrics.failed_projects += 1
+        message = f"Error processing {gid} ({reason}): {error}" if error else f"Failed to process project {gid} ({reason})"
+        logger.error(message)
+        result.errors.append(message)
+        self.metrics.add_error("processing_error")
+    
+    def _retry_dead_letters(self, dead_letters: DeadLetterQueue, result: AssemblyResult, max_workers: int = 1) -> None:
+        """
+        Retry deferred GIDs once after the main pass, with escalated scraper and map
+        timeouts. Only retryable reasons get the second pass; no_data/parse_error and
+        repeat failures count as failed.
+        """
+        letters = dead_letters.drain()
+        if not letters:
+            return
+        for reason, count in dead_letters.reason_counts().items():
+            self.metrics.dead_letter_reasons[reason] = self.metrics.dead_letter_reasons.get(reason, 0) + count
+        retryable = [d for d in letters if is_retryable(d.reason)]
+        for d in letters:
+            if not is_retryable(d.reason):
+                self._record_failed(d.gid, d.reason, d.error, result)
+        if not retryable:
+            return
+        logger.info(f"Retrying {len(retryable)} of {len(letters)} deferred projects", extra=dead_letters.reason_counts())
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_letter = {executor.submit(self._process_single_project, d.gid, True): d for d in retryable}
+            for future in as_completed(future_to_letter):
+                letter = future_to_letter[future]
+                try:
+                    project = future.result()
+                except Exception as e:
+                    self._record_failed(letter.gid, classify_failure(e), e, result)
+                    continue
+                if project:
+                    self.metrics.retry_recovered += 1
+                    self._record_completed(project, result)
+                else:
+                    self._record_failed(letter.gid, NO_DATA, None, result)
+    
+    def _retry_map_centers(self, result: AssemblyResult, max_workers: int = 1) -> None:
+        """Second map-center attempt, with doubled timeouts, for completed projects whose lookup was deferred."""
+        letters = self._map_letters.drain() if self._map_letters is not None else []
+        if not letters:
+            return
+        for reason, count in self._map_letters.reason_counts().items():
+            key = f"map_center_{reason}"
+            self.metrics.dead_letter_reasons[key] = self.metrics.dead_letter_reasons.get(key, 0) + count
+        index = {str(p.gid): i for i, p in enumerate(result.projects)}
+        pending = [d for d in letters if d.gid in index]
+        logger.info(f"Retrying {len(pending)} deferred map-center lookups")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_letter = {
+                executor.submit(self._with_map_center, result.projects[index[d.gid]], MAP_CENTER_TIMEOUT_MS * 2): d
+                for d in pending
+            }
+            for future in as_completed(future_to_letter):
+                letter = future_to_letter[future]
+                try:
+                    project = future.result()
+                except Exception as e:
+                    logger.warning(f"Map center fetch failed for {letter.gid} ({classify_failure(e)}): {e}")
+                    continue
+                result.projects[index[letter.gid]] = project
+                if project.location and project.location.latitude is not None:
+                    self.metrics.map_retry_recovered += 1
+    
+    @staticmethod
+    def _with_map_center(project: Project, timeout_ms: int) -> Project:
+        """Project with the map-page center as its location; raises ScrapeDeferred on a failed fetch."""
+        from services.map_center import fetch_map_center
+        from dataclasses import replace
+        mc = fetch_map_center(gid=str(project.gid), headless=(os.getenv('SCRAPER_HEADFUL', 'false').lower() != 'true'),
+                              goto_timeout_ms=timeout_ms, ready_timeout_ms=timeout_ms,
+                              overall_timeout_ms=timeout_ms, defer_errors=True)
+        if not mc:
+            return project
+        loc = project.location or ProjectLocation()
+        loc = replace(
+            loc,
+            latitude=mc.get('latitude', loc.latitude),
+            longitude=mc.get('longitude', loc.longitude),
+            location_source=loc.location_source or 'scraper_map'
+        )
+        return replace(project, location=loc)
+    
+    def _process_single_project(self, gid: str, retry: bool = False) -> Optional[Project]:
         """
         Process a single project GID into a complete Project object.
         
         Args:
             gid: Project GID to process
+            retry: Deferred-retry pass; the scraper gets its full goto ladder and the
+                map-center fetch doubled timeouts
             
         Returns:
-            Complete Project object or None if processing fails
+            Complete Project object
+        
+        Raises:
+            ScrapeDeferred: with the classified reason when processing fails
         """
         try:
             logger.debug(f"Processing project {gid}")
@@ -403,39 +536,46 @@ class ProjectAssembler:
 
             # Step 4: If no API project data, attempt to build minimal project from scraper
             if project is None:
-                try:
-                    from services.playwright_parallel_scraper import PlaywrightParallelScraper
-                    import asyncio
+                from services.playwright_parallel_scraper import PlaywrightParallelScraper, ScrapeFailure
+                import asyncio
 
-                    async def _run_scrape() -> list:
-                        scraper = PlaywrightParallelScraper()
-                        return await scraper.scrape_many_parallel([str(gid)], max_concurrency=1, headless=(os.getenv('SCRAPER_HEADFUL', 'false').lower() != 'true'), verbose=False)
+                async def _run_scrape() -> list:
+                    scraper = PlaywrightParallelScraper()
+                    # Main pass: a single goto; on the deferred retry the scraper escalates through its full ladder
+                    return [item async for item in scraper.iter_scrape(
+                        [str(gid)], max_concurrency=1, retry_failed=retry,
+                        headless=(os.getenv('SCRAPER_HEADFUL', 'false').lower() != 'true'))]
 
-                    recs = asyncio.run(_run_scrape())
+                # Records from the batch prefetch (sharded scraping) skip the per-project browser
+                rec = self._prefetched.get(str(gid))
+                if rec is None:
+                    try:
+                        recs = asyncio.run(_run_scrape())
+                    except Exception as e:
+                        logger.warning(f"Scraper fallback failed for {gid}: {e}")
+                        raise ScrapeDeferred(classify_failure(e), f"Scraper fallback failed: {e}") from e
                     rec = recs[0] if recs else None
-                    if rec:
-                        # Build minimal project using scraped fields
-                        location = ProjectLocation()
-                        project = Project(
-                            gid=str(gid),
-                            name=getattr(rec, 'project_name', '') or '',
-                            location=location,
-                            stage=getattr(rec, 'stage', None),
-                            commodities=getattr(rec, 'commodities', None),
-                            operator=getattr(rec, 'operator', None),
-                            data_sources={DataSource.SCRAPER},
-                            processing_stage=ProcessingStage.DISCOVERED,
-                            project_url=self.project_urls.get(gid)
-                        )
-                        logger.info(f"Built minimal project from scraper for {gid}: {project.name}")
-                    else:
-                        logger.warning(f"Scraper did not return data for {gid}")
-                except Exception as e:
-                    logger.warning(f"Scraper fallback failed for {gid}: {e}")
+                if isinstance(rec, ScrapeFailure):
+                    logger.warning(f"Scraper fallback failed for {gid} ({rec.reason}): {rec.error}")
+                    raise ScrapeDeferred(rec.reason, f"Scraper fallback failed: {rec.error}")
+                if rec is None:
+                    logger.warning(f"Scraper did not return data for {gid}")
+                    raise ScrapeDeferred(NO_DATA, "Scraper did not return data")
 
-                if project is None:
-                    # As a last resort, skip this gid
-                    return None
+                # Build minimal project using scraped fields
+                location = ProjectLocation()
+                project = Project(
+                    gid=str(gid),
+                    name=getattr(rec, 'project_name', '') or '',
+                    location=location,
+                    stage=getattr(rec, 'stage', None),
+                    commodities=getattr(rec, 'commodities', None),
+                    operator=getattr(rec, 'operator', None),
+                    data_sources={DataSource.SCRAPER},
+                    processing_stage=ProcessingStage.DISCOVERED,
+                    project_url=self.project_urls.get(gid)
+                )
+                logger.info(f"Built minimal project from scraper for {gid}: {project.name}")
 
                 # Attach relationships to scraped project if any
                 if relationships:
@@ -458,24 +598,19 @@ class ProjectAssembler:
                             project = replace(project, operator=op)
             
             # Step 5: Fetch map center if lat/lon missing, then geocode
-            try:
-                if project and (not project.location or project.location.latitude is None or project.location.longitude is None):
-                    from services.map_center import fetch_map_center
-                    mc = fetch_map_center(gid=str(gid), headless=(os.getenv('SCRAPER_HEADFUL', 'false').lower() != 'true'))
-                    if mc:
-                        from dataclasses import replace
-                        loc = project.location or ProjectLocation()
-                        loc = replace(
-                            loc,
-                            latitude=mc.get('latitude', loc.latitude),
-                            longitude=mc.get('longitude', loc.longitude),
-                            location_source=loc.location_source or 'scraper_map'
-                        )
-                        project = replace(project, location=loc)
-            except Exception as e:
-                logger.warning(f"Map center fetch failed for {gid}: {e}")
+            if not project.location or project.location.latitude is None or project.location.longitude is None:
+                try:
+                    project = self._with_map_center(project, MAP_CENTER_TIMEOUT_MS * (2 if retry else 1))
+                except Exception as e:
+                    reason = classify_failure(e)
+                    # Keep what was scraped; only the map lookup is retried after the batch
+                    if not retry and is_retryable(reason) and self._map_letters is not None:
+                        logger.warning(f"Deferring map center for {gid} ({reason}): {e}")
+                        self._map_letters.add(str(gid), reason, e)
+                    else:
+                        logger.warning(f"Map center fetch failed for {gid} ({reason}): {e}")
 
-            project = self._maybe_enrich_location(project)
+            # Geocoding happens in the batch-level stage (_enrich_locations)
             
             # Step 6: Update processing stage
             project = project.update_stage(ProcessingStage.COMPLETED)
@@ -483,78 +618,107 @@ class ProjectAssembler:
             logger.info(f"✅ Successfully processed {gid}: {project.name} with {len(project.company_relationships)} relationships")
             return project
             
+        except ScrapeDeferred:
+            raise
         except Exception as e:
             logger.error(f"Failed to process project {gid}: {e}")
-            return None
+            raise ScrapeDeferred(classify_failure(e), str(e)) from e
 
-    def _maybe_enrich_location(self, project: Project) -> Project:
-        """Apply geocoding to fill missing state/postcode/ISO and normalize precision.
-        Keeps API lat/lon precision (does not round). Adds provenance fields.
+    def _enrich_locations(self, projects: List[Project]) -> List[Project]:
+        """
+        Geocoding stage run once per batch, after assembly threads finish.
+        Collects distinct reverse (coords without state) and forward (location
+        string without coords/state) keys, resolves them in bulk through the
+        geocoder (cache/offline/proximity first, unique misses queued once) and
+        applies the results back. Keeps API lat/lon precision (does not round).
         """
+        if not self.geocoder or not projects:
+            return projects
+        
+        reverse_keys: Dict[tuple, None] = {}
+        forward_keys: Dict[str, None] = {}
+        for project in projects:
+            kind, key = self._geocode_key(project)
+            if kind == 'reverse':
+                reverse_keys[key] = None
+            elif kind == 'forward':
+                forward_keys[key] = None
+        if not reverse_keys and not forward_keys:
+            return projects
+        
+        try:
+            reverse_list = list(reverse_keys)
+            reverse_results = dict(zip(reverse_list, self.geocoder.reverse_geocode_many(reverse_list)))
+            forward_futures = {key: self.geocoder.submit_forward(key) for key in forward_keys}
+            forward_results = {key: fut.result() for key, fut in forward_futures.items()}
+        except Exception as e:
+            logger.warning(f"Batch geocoding failed: {e}")
+            return projects
+        
+        logger.info("Geocoding stage completed", extra={
+            "projects": len(projects),
+            "unique_reverse_keys": len(reverse_keys),
+            "unique_forward_keys": len(forward_keys)
+        })
+        
+        enriched_projects = []
+        for project in projects:
+            kind, key = self._geocode_key(project)
+            data = None
+            if kind == 'reverse':
+                data = reverse_results.get(key)
+            elif kind == 'forward':
+                data = forward_results.get(key)
+            enriched_projects.append(self._apply_geocode(project, kind, data) if data else project)
+        return enriched_projects
+    
+    @staticmethod
+    def _geocode_key(project: Project) -> tuple:
+        """Return ('reverse', (lat, lon)), ('forward', location_string) or (None, None)."""
+        loc = project.location
+        if not loc or loc.state:
+            return None, None
+        if loc.latitude is not None and loc.longitude is not None:
+            return 'reverse', (loc.latitude, loc.longitude)
+        if loc.location_string:
+            return 'forward', ' '.join(loc.location_string.strip().split())
+        return None, None
+    
+    def _apply_geocode(self, project: Project, kind: str, data: Dict[str, Any]) -> Project:
+        """Map a geocoder result onto the project location and add provenance fields."""
         try:
-            if not self.geocoder or not project.location:
-                return project
-            loc = project.location
-            have_state = bool(loc.state)
-            have_coords = loc.latitude is not None and loc.longitude is not None
             from dataclasses import replace
-            enriched = loc
-            
-            # Reverse geocode if we have coordinates but missing state
-            if have_coords and not have_state:
-                data = self.geocoder.reverse_geocode(loc.latitude, loc.longitude)
-                if data and 'address' in data:
-                    addr = data['address']
-                    state = (
-                        addr.get('state')
-                        or addr.get('state_district')
-                        or addr.get('region')
-                        or addr.get('province')
-                        or addr.get('territory')
-                    )
-                    enriched = replace(
-                        enriched,
-                        state=state or enriched.state,
-                        country=addr.get('country', enriched.country),
-                        postcode=addr.get('postcode'),
-                        iso3166_2=addr.get('ISO3166-2-lvl4') or addr.get('ISO3166-2-lvl6'),
-                        county=addr.get('county'),
-                        territory=addr.get('territory'),
-                        geocoded=True,
-                        location_source=enriched.location_source or 'geocode'
-                    )
-            # Forward geocode if we have location_string but no coords/state
-            elif not have_coords and (loc.location_string and not have_state):
-                data = self.geocoder.forward_geocode(loc.location_string)
-                if data:
-                    lat = float(data.get('lat')) if data.get('lat') else None
-                    lon = float(data.get('lon')) if data.get('lon') else None
-                    addr = data.get('address', {}) if isinstance(data, dict) else {}
-                    state = (
-                        addr.get('state')
-                        or addr.get('state_district')
-                        or addr.get('region')
-                        or addr.get('province')
-                        or addr.get('territory')
-                    )
-                    enriched = replace(
-                        enriched,
-                        latitude=lat if lat is not None else enriched.latitude,
-                        longitude=lon if lon is not None else enriched.longitude,
-                        state=state or enriched.state,
-                        country=addr.get('country', enriched.country),
-                        postcode=addr.get('postcode'),
-                        iso3166_2=addr.get('ISO3166-2-lvl4') or addr.get('ISO3166-2-lvl6'),
-                        county=addr.get('county'),
-                        territory=addr.get('territory'),
-                        geocoded=True,
-                        location_source=enriched.location_source or 'geocode'
-                    )
-            
-            if enriched is not loc:
-                from dataclasses import replace as r
-                project = r(project, location=enriched)
-            return project
+            loc = project.location
+            addr = data.get('address', {}) if isinstance(data, dict) else {}
+            if kind == 'reverse' and not addr:
+                return project
+            state = (
+                addr.get('state')
+                or addr.get('state_district')
+                or addr.get('region')
+                or addr.get('province')
+                or addr.get('territory')
+            )
+            updates = {}
+            # Forward geocode also supplies coordinates
+            if kind == 'forward':
+                lat = float(data.get('lat')) if data.get('lat') else None
+                lon = float(data.get('lon')) if data.get('lon') else None
+                updates['latitude'] = lat if lat is not None else loc.latitude
+                updates['longitude'] = lon if lon is not None else loc.longitude
+            enriched = replace(
+                loc,
+                state=state or loc.state,
+                country=addr.get('country', loc.country),
+                postcode=addr.get('postcode'),
+                iso3166_2=addr.get('ISO3166-2-lvl4') or addr.get('ISO3166-2-lvl6'),
+                county=addr.get('county'),
+                territory=addr.get('territory'),
+                geocoded=True,
+                location_source=loc.location_source or 'geocode',
+                **updates
+            )
+            return replace(project, location=enriched)
         except Exception as e:
             logger.warning(f"Location enrichment failed for {project.gid}: {e}")
             return project
@@ -636,9 +800,18 @@ class ProjectAssembler:
     
     def get_metrics(self) -> ProcessingMetrics:
         """Get processing metrics for observability."""
+        if self.geocoder:
+            self.metrics.geocoding_stats = self.geocoder.get_stats()
         return self.metrics
     
     def close(self):
         """Cleanup resources."""
         if self.api_client:
             self.api_client.close()
+        if self.geocoder:
+            self.geocoder.close()
+        try:
+            from services.map_center import close_map_center_service
+            close_map_center_service()
+        except Exception:
+            pass
@@ -321,6 +321,15 @@ class ProcessingMetrics:
     # Errors
     error_summary: Dict[str, int] = field(default_factory=dict)
     
+    # Geocoding lookup counters and cache/proximity hit rates
+    geocoding_stats: Dict[str, Any] = field(default_factory=dict)
+    
+    # Deferred retries: first-pass failures by reason, and how many the retry recovered
+    dead_letter_reasons: Dict[str, int] = field(default_factory=dict)
+    retry_recovered: int = 0
+    # Projects whose deferred map-center lookup succeeded on the map-only retry
+    map_retry_recovered: int = 0
+    
     def add_error(self, error_type: str):
         """Track an error occurrence."""
         self.error_summary[error_type] = self.error_summary.get(error_type, 0) + 1
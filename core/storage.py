@@ -6,9 +6,10 @@ Implements Factor 4 (Backing Services) with pluggable storage backends.
 
 import json
 import os
+import glob
 import pandas as pd
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable
 from datetime import datetime
 from dataclasses import asdict
 
@@ -16,6 +17,9 @@ from .models import Project, Company, ProcessingMetrics
 
 logger = logging.getLogger(__name__)
 
+# Output kinds that export_all() can regenerate
+EXPORT_FORMATS = ('projects_json', 'companies_json', 'excel')
+
 
 class ProjectStorage:
     """
@@ -365,29 +369,110 @@ class ProjectStorage:
             logger.error(f"Failed to save metrics: {e}")
             raise
     
-    def export_all(self, projects: List[Project] = None) -> Dict[str, str]:
+    def find_latest_projects_file(self) -> Optional[str]:
+        """Return the newest projects_processed_*.json in the JSON output dir, if any."""
+        pattern = os.path.join(self.json_dir, "projects_processed_*.json")
+        candidates = glob.glob(pattern)
+        if not candidates:
+            return None
+        # Timestamped names sort chronologically; mtime breaks ties for copied files
+        return max(candidates, key=lambda p: (os.path.basename(p), os.path.getmtime(p)))
+    
+    def iter_projects(self, filepath: str) -> Iterator[Project]:
+        """
+        Lazily yield Project objects from a saved projects JSON file.
+        
+        Uses ijson to stream the 'projects' array when it is installed, so a
+        full production file never has to be materialised as raw dicts.
+        Falls back to json.load otherwise.
+        """
+        try:
+            import ijson  # type: ignore
+        except Exception:
+            ijson = None
+        
+        if ijson:
+            with open(filepath, 'rb') as f:
+                for item in ijson.items(f, 'projects.item', use_float=True):
+                    project = self._project_from_saved(item)
+                    if project:
+                        yield project
+            return
+        
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Accept both the wrapped {'metadata', 'projects'} layout and a bare list
+        items = data.get('projects', []) if isinstance(data, dict) else data
+        for item in items:
+            project = self._project_from_saved(item)
+            if project:
+                yield project
+    
+    def _project_from_saved(self, item: Dict[str, Any]) -> Optional[Project]:
+        """Rebuild a Project from its saved dict, skipping malformed entries."""
+        try:
+            return Project.from_dict(item)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable project {item.get('gid') if isinstance(item, dict) else '?'}: {e}")
+            return None
+    
+    def load_projects(self, filepath: Optional[str] = None) -> List[Project]:
+        """
+        Load previously processed projects for re-export.
+        
+        Args:
+            filepath: Explicit projects JSON path. If None, uses the latest file.
+            
+        Returns:
+            List of Project objects (empty if nothing is found)
+        """
+        filepath = filepath or self.find_latest_projects_file()
+        if not filepath or not os.path.exists(filepath):
+            logger.warning("No processed projects file found for export")
+            return []
+        
+        projects = list(self.iter_projects(filepath))
+        logger.info(f"Loaded {len(projects)} projects from {os.path.basename(filepath)}")
+        return projects
+    
+    def export_all(self, projects: List[Project] = None, formats: Optional[Iterable[str]] = None) -> Dict[str, str]:
         """
         Export all available data in multiple formats.
         
         Args:
             projects: Optional list of projects. If None, loads from latest file.
+            formats: Subset of EXPORT_FORMATS to write. Defaults to all of them,
+                except that projects_json is skipped when re-exporting from disk.
             
         Returns:
             Dictionary of exported file paths
         """
-        if projects is None:
+        reloaded = projects is None
+        if reloaded:
+            projects = self.load_projects()
+        if not projects:
             logger.warning("No projects provided for export")
             return {}
         
+        if formats is None:
+            formats = [f for f in EXPORT_FORMATS if not (reloaded and f == 'projects_json')]
+        formats = [f.strip() for f in formats if f and f.strip()]
+        unknown = [f for f in formats if f not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown export formats: {', '.join(unknown)}")
+        
         try:
             results = {}
             
             # Export JSON formats
-            results['projects_json'] = self.save_projects(projects)
-            results['companies_json'] = self.save_companies_with_projects(projects)
+            if 'projects_json' in formats:
+                results['projects_json'] = self.save_projects(projects)
+            if 'companies_json' in formats:
+                results['companies_json'] = self.save_companies_with_projects(projects)
             
             # Export Excel
-            results['excel_export'] = self.export_to_excel(projects)
+            if 'excel' in formats:
+                results['excel_export'] = self.export_to_excel(projects)
             
             logger.info("All exports completed", extra={
                 "files_created": len(results),
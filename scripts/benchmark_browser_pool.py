@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Browser Pool Benchmark
+Compares page layouts for the Playwright scrapers on real project pages:
+  tabs      - one context, one pooled tab per worker (what the scrapers use)
+  contexts  - one context (with its own single-page pool) per worker
+Reports pages/sec, mean latency, peak RSS of the Chromium process tree and
+network bytes per page, with the static-asset cache off and/or on.
+
+Usage:
+  python scripts/benchmark_browser_pool.py --gids 1234 5678 ... --workers 4
+  python scripts/benchmark_browser_pool.py --gids-file gids.txt --modes tabs contexts --max-uses 25
+  python scripts/benchmark_browser_pool.py --gids-file gids.txt --modes tabs --asset-cache off on
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from typing import List, Dict, Any
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.browser_pool import PagePool, BlockingPolicy, make_route_handler  # noqa: E402
+from services.asset_cache import AssetCache, TransferMeter  # noqa: E402
+from services.playwright_parallel_scraper import BASE_HOST, TABLES_STABLE_JS  # noqa: E402
+
+
+def browser_tree_rss_mb() -> float:
+    """RSS of all child processes of this interpreter (Playwright driver + Chromium)."""
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+async def _sample_rss(stop: asyncio.Event, peak: Dict[str, float]) -> None:
+    while not stop.is_set():
+        peak["rss_mb"] = max(peak["rss_mb"], browser_tree_rss_mb())
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _visit(pool: PagePool, gid: str, latencies: List[float]) -> None:
+    start = time.perf_counter()
+    async with pool.lease() as lease:
+        try:
+            await lease.page.goto(f"{BASE_HOST}/project-profile?gid={gid}", wait_until="domcontentloaded", timeout=45000)
+            await lease.page.evaluate(TABLES_STABLE_JS, {"quietMs": 600, "maxMs": 15000})
+        except Exception:
+            lease.broken = True
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_mode(mode: str, gids: List[str], workers: int, max_uses: int, headless: bool,
+                   asset_cache: bool = False) -> Dict[str, Any]:
+    from playwright.async_api import async_playwright
+
+    pw = await async_playwright().start()
+    browser = await pw.chromium.launch(headless=headless, args=["--no-sandbox", "--disable-gpu"])
+    contexts = []
+    pools: List[PagePool] = []
+    cache = AssetCache() if asset_cache else None
+    meter = TransferMeter(cache)
+    policy = BlockingPolicy("project")
+    for _ in range(1 if mode == "tabs" else workers):
+        ctx = await browser.new_context(viewport={"width": 1280, "height": 900})
+        meter.attach(ctx)
+        await ctx.route("**/*", make_route_handler(policy, cache))
+        contexts.append(ctx)
+        pools.append(PagePool(ctx, max_uses=max_uses))
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for g in gids:
+        queue.put_nowait(g)
+    latencies: List[float] = []
+    peak = {"rss_mb": 0.0}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(stop, peak))
+
+    async def worker(idx: int) -> None:
+        pool = pools[idx % len(pools)]
+        while not queue.empty():
+            await _visit(pool, queue.get_nowait(), latencies)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(i) for i in range(workers)))
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampler
+        stats = [p.get_stats() for p in pools]
+        for p in pools:
+            await p.close()
+        for ctx in contexts:
+            await ctx.close()
+        await browser.close()
+        await pw.stop()
+
+    transfer = meter.get_stats(pages=len(latencies))
+    return {
+        "mode": mode,
+        "asset_cache": "on" if asset_cache else "off",
+        "workers": workers,
+        "pages": len(latencies),
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "mean_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "peak_rss_mb": round(peak["rss_mb"], 1),
+        "pages_created": sum(s["pages_created"] for s in stats),
+        "pages_discarded": sum(s["pages_discarded"] for s in stats),
+        "bytes_per_page": transfer["bytes_per_page"],
+        "asset_hits": transfer.get("asset_hits", 0),
+        "bytes_by_domain": transfer["bytes_by_domain"],
+        "request_blocking": policy.get_stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark tabs-per-context vs contexts-per-worker")
+    parser.add_argument("--gids", nargs="*", default=[], help="Project GIDs to visit")
+    parser.add_argument("--gids-file", help="File with one GID per line")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-uses", type=int, default=int(os.getenv('SCRAPER_PAGE_MAX_USES', '25')))
+    parser.add_argument("--modes", nargs="+", default=["tabs", "contexts"], choices=["tabs", "contexts"])
+    parser.add_argument("--asset-cache", nargs="+", default=["off", "on"], choices=["off", "on"],
+                        help="Run with the static-asset cache off and/or on (outputs/cache/assets)")
+    parser.add_argument("--headful", action="store_true")
+    args = parser.parse_args()
+
+    gids = list(args.gids)
+    if args.gids_file:
+        with open(args.gids_file, 'r', encoding='utf-8') as f:
+            gids.extend(line.strip() for line in f if line.strip())
+    if not gids:
+        parser.error("no GIDs given (use --gids or --gids-file)")
+
+    results = [
+        asyncio.run(run_mode(m, gids, args.workers, args.max_uses, not args.headful, asset_cache=(c == "on")))
+        for m in args.modes for c in args.asset_cache
+    ]
+
+    print(f"{'mode':<10}{'assets':>8}{'pages/s':>10}{'mean s':>10}{'peak RSS MB':>14}{'pages made':>12}{'KB/page':>10}")
+    for r in results:
+        kb = round(r['bytes_per_page'] / 1024, 1) if r['bytes_per_page'] is not None else '-'
+        print(f"{r['mode']:<10}{r['asset_cache']:>8}{r['pages_per_sec']:>10}{r['mean_latency_s'] or '-':>10}"
+              f"{r['peak_rss_mb']:>14}{r['pages_created']:>12}{kb:>10}")
+
+    os.makedirs(os.path.join("outputs", "reports"), exist_ok=True)
+    out = os.path.join("outputs", "reports", f"browser_pool_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Table Parser Benchmark
+Runs every HTML parser backend (services.html_tables) over a corpus of saved
+table HTML and reports time per table plus any result that differs from the
+bs4 reference. No browser needed. Exits 1 on a mismatch, so it doubles as a
+parser regression check.
+
+Corpus: the committed *.html fixtures in scripts/fixtures/tables (property
+tables and company-profile pages, one per file) plus any properties-table
+snapshots in the page cache (outputs/cache).
+
+Usage:
+  python scripts/benchmark_parsers.py                          # fixtures + page-cache snapshots
+  python scripts/benchmark_parsers.py --no-cache --repeat 20   # committed fixtures only
+  python scripts/benchmark_parsers.py --export my_fixtures     # freeze the corpus as fixture files
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_tables import BACKENDS, parser_backend, table_rows, company_projects  # noqa: E402
+from services.page_cache import PageResultCache  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tables")
+
+PARSERS = {
+    "table_rows": lambda html, backend: table_rows(html, backend),
+    # table_html is each backend's own serialization, so only the rows are compared
+    "company_projects": lambda html, backend: company_projects(html, backend)["rows"],
+}
+
+
+def load_corpus(fixtures_dir: str, cache_path: str, use_cache: bool) -> List[Tuple[str, str]]:
+    """(name, html) pairs from fixture files and page-cache snapshots."""
+    corpus: List[Tuple[str, str]] = []
+    if fixtures_dir:
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+            with open(path, 'r', encoding='utf-8') as f:
+                corpus.append((os.path.basename(path), f.read()))
+    if use_cache and os.path.exists(cache_path):
+        cache = PageResultCache(cache_path)
+        try:
+            for gid in cache.iter_snapshot_gids():
+                for i, html in enumerate(cache.get_table_snapshots(gid)):
+                    corpus.append((f"gid{gid}_{i}", html))
+        finally:
+            cache.close()
+    return corpus
+
+
+def export_fixtures(corpus: List[Tuple[str, str]], out_dir: str) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    for name, html in corpus:
+        stem = name[:-5] if name.endswith(".html") else name
+        with open(os.path.join(out_dir, f"{stem}.html"), 'w', encoding='utf-8') as f:
+            f.write(html)
+    print(f"Wrote {len(corpus)} fixtures to {out_dir}")
+
+
+def run(corpus: List[Tuple[str, str]], backends: List[str], repeat: int) -> Dict[str, Any]:
+    timings: Dict[str, Dict[str, float]] = {p: {b: 0.0 for b in backends} for p in PARSERS}
+    mismatches: List[Dict[str, str]] = []
+    for name, html in corpus:
+        for parser, fn in PARSERS.items():
+            reference = fn(html, "bs4")
+            for backend in backends:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    result = fn(html, backend)
+                timings[parser][backend] += time.perf_counter() - start
+                if result != reference:
+                    mismatches.append({"fixture": name, "parser": parser, "backend": backend})
+
+    calls = max(1, len(corpus) * repeat)
+    summary: Dict[str, Any] = {}
+    for parser, per_backend in timings.items():
+        base = per_backend.get("bs4")
+        summary[parser] = {
+            b: {
+                "us_per_table": round(1e6 * t / calls, 1),
+                "speedup_vs_bs4": round(base / t, 2) if base and t else None,
+            }
+            for b, t in per_backend.items()
+        }
+    return {"tables": len(corpus), "repeat": repeat, "parsers": summary, "mismatches": mismatches}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark table HTML parser backends offline")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of *.html table/company-page fixtures")
+    parser.add_argument("--cache-path", default=os.getenv('SCRAPE_CACHE_PATH') or os.path.join("outputs", "cache", "page_cache.sqlite3"))
+    parser.add_argument("--no-cache", action="store_true", help="Ignore page-cache snapshots")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--export", help="Write the corpus to this directory as fixtures and exit")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.fixtures, args.cache_path, not args.no_cache)
+    if not corpus:
+        parser.error(f"empty corpus (no *.html in {args.fixtures} and no page-cache snapshots)")
+    if args.export:
+        export_fixtures(corpus, args.export)
+        return
+
+    backends = [b for b in args.backends if parser_backend(b) == b]
+    skipped = set(args.backends) - set(backends)
+    if skipped:
+        print(f"⚠️ Backends not installed, skipped: {', '.join(sorted(skipped))}")
+    report = run(corpus, backends, max(1, args.repeat))
+
+    print(f"{len(corpus)} tables x {report['repeat']} runs")
+    print(f"{'parser':<18}{'backend':<9}{'µs/table':>12}{'speedup':>10}")
+    for name, per_backend in report["parsers"].items():
+        for backend, r in per_backend.items():
+            print(f"{name:<18}{backend:<9}{r['us_per_table']:>12}{r['speedup_vs_bs4'] or '-':>10}")
+    for m in report["mismatches"]:
+        print(f"❌ {m['backend']} differs from bs4 on {m['fixture']} ({m['parser']})")
+
+    os.makedirs(os.path.join("outputs", "reports"), exist_ok=True)
+    out = os.path.join("outputs", "reports", f"parser_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out}")
+    if report["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Adaptive Concurrency (AIMD)
+Additive-increase / multiplicative-decrease limit for concurrent page scrapes.
+The limit grows by one per healthy round (p95 navigation latency and error rate
+within bounds) and is cut multiplicatively on timeouts or 429/503 responses.
+Every change is kept as a decision record for the run metrics.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = {429, 503}
+
+
+class AIMDController:
+    """Dynamic concurrency limit fed by per-navigation observations."""
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 decrease_factor: float = 0.5, window: int = 20,
+                 p95_target_ms: float = 15000, max_error_rate: float = 0.1):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.decrease_factor = decrease_factor
+        self.p95_target_ms = p95_target_ms
+        self.max_error_rate = max_error_rate
+        self._samples: deque = deque(maxlen=window)  # (latency_ms or None, ok)
+        self._since_change = 0
+        self._since_cut = window
+        self._active = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self.decisions: List[Dict[str, Any]] = []
+        self._counts: Dict[str, int] = {"increases": 0, "decreases": 0, "timeouts": 0, "throttled": 0}
+
+    def _p95(self) -> Optional[float]:
+        latencies = sorted(l for l, ok in self._samples if ok and l is not None)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def _decide(self, action: str, new_limit: int, reason: str) -> None:
+        old, self.limit = self.limit, new_limit
+        self._since_change = 0
+        if action == "decrease":
+            self._since_cut = 0
+        self._counts["increases" if action == "increase" else "decreases"] += 1
+        p95 = self._p95()
+        self.decisions.append({
+            "t": round(time.time(), 3),
+            "action": action,
+            "from": old,
+            "to": new_limit,
+            "reason": reason,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+            "error_rate": round(self._error_rate(), 3),
+        })
+        logger.debug(f"Scrape concurrency {action}: {old} -> {new_limit} ({reason})")
+
+    def observe(self, latency_ms: Optional[float], ok: bool = True, timeout: bool = False,
+                status: Optional[int] = None) -> None:
+        """Record one navigation; timeouts and 429/503 cut the limit immediately."""
+        throttled = status in THROTTLE_STATUSES
+        self._samples.append((latency_ms, ok and not (timeout or throttled)))
+        self._since_change += 1
+        self._since_cut += 1
+        if timeout or throttled:
+            self._counts["timeouts" if timeout else "throttled"] += 1
+            # One cut per round: the in-flight pages started under the old limit
+            if self._since_cut >= self.limit:
+                new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+                if new_limit < self.limit:
+                    self._decide("decrease", new_limit, "timeout" if timeout else f"http_{status}")
+            return
+        # Additive increase once a full round at the current limit looked healthy
+        if self._since_change >= self.limit and self.limit < self.max_limit:
+            p95 = self._p95()
+            if (p95 is None or p95 <= self.p95_target_ms) and self._error_rate() <= self.max_error_rate:
+                self._decide("increase", self.limit + 1, "healthy")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the currently allowed concurrent slots."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            while self._active >= self.limit:
+                await self._cond.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        p95 = self._p95()
+        return {
+            "concurrency_limit": self.limit,
+            "concurrency_p95_ms": round(p95, 1) if p95 is not None else None,
+            "concurrency_error_rate": round(self._error_rate(), 3),
+            **{f"concurrency_{k}": v for k, v in self._counts.items()},
+            "concurrency_decisions": list(self.decisions),
+        }
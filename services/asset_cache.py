@@ -0,0 +1,212 @@
+"""
+Browser Asset Cache
+Static JS/CSS bundles are kept in memory and under outputs/cache/assets and
+served to Playwright with route.fulfill, so repeat page loads only transfer the
+dynamic data. Also persists context storage state (cookies/localStorage) across
+contexts and runs, and meters bytes transferred per page.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = os.path.join("outputs", "cache", "assets")
+STORAGE_STATE_PATH = os.path.join("outputs", "cache", "storage_state.json")
+
+CACHEABLE_RESOURCE_TYPES = {"script", "stylesheet"}
+CACHEABLE_SUFFIXES = (".js", ".css", ".mjs")
+# Response headers worth replaying; everything else is connection-specific
+KEPT_HEADERS = {"content-type", "access-control-allow-origin", "timing-allow-origin"}
+
+
+def asset_cache_enabled() -> bool:
+    return os.getenv('SCRAPER_ASSET_CACHE', 'true').lower() == 'true'
+
+
+def storage_state_path() -> Optional[str]:
+    """Storage-state file to reuse, or None when disabled (SCRAPER_STORAGE_STATE=off)."""
+    path = os.getenv('SCRAPER_STORAGE_STATE', STORAGE_STATE_PATH)
+    return None if path.lower() in ("", "off", "false", "none") else path
+
+
+def _write_replace(path: str, data: bytes) -> None:
+    """Write via a unique temp file and rename, so concurrent writers never see a torn file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def storage_state_kwargs() -> Dict[str, Any]:
+    """new_context() kwargs that restore the saved cookies/localStorage, if any."""
+    path = storage_state_path()
+    if path and os.path.exists(path):
+        return {"storage_state": path}
+    return {}
+
+
+async def save_storage_state(context) -> None:
+    path = storage_state_path()
+    if not path or context is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _write_replace(path, json.dumps(await context.storage_state()).encode("utf-8"))
+    except Exception as e:
+        logger.debug(f"Could not save storage state: {e}")
+
+
+class AssetCache:
+    """
+    URL-keyed cache of static bundles. Memory first, then disk (entries older than
+    ttl_hours are refetched). Only successful GETs of scripts/stylesheets are stored.
+    """
+
+    def __init__(self, cache_dir: str = ASSET_DIR, ttl_hours: Optional[float] = None):
+        self.cache_dir = cache_dir
+        self.ttl_s = 3600 * (ttl_hours if ttl_hours is not None else float(os.getenv('SCRAPER_ASSET_CACHE_TTL_HOURS', '24')))
+        self._mem: Dict[str, Tuple[int, Dict[str, str], bytes]] = {}
+        self._stats: Dict[str, int] = {"asset_hits": 0, "asset_misses": 0, "asset_bytes_served": 0}
+        self._served: set = set()  # requests fulfilled from cache, not yet seen by a TransferMeter
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cacheable(request) -> bool:
+        if request.method != "GET":
+            return False
+        if request.resource_type in CACHEABLE_RESOURCE_TYPES:
+            return True
+        return request.url.split("?")[0].lower().endswith(CACHEABLE_SUFFIXES)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".bin", base + ".json"
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        entry = self._mem.get(url)
+        if entry is not None:
+            return entry
+        body_path, meta_path = self._paths(url)
+        try:
+            if time.time() - os.path.getmtime(meta_path) > self.ttl_s:
+                return None
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        entry = (int(meta.get("status", 200)), meta.get("headers") or {}, body)
+        self._mem[url] = entry
+        return entry
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        kept = {k: v for k, v in headers.items() if k.lower() in KEPT_HEADERS}
+        self._mem[url] = (status, kept, body)
+        body_path, meta_path = self._paths(url)
+        # Write-then-rename: sharded processes and scraper threads share this directory
+        try:
+            _write_replace(body_path, body)
+            _write_replace(meta_path, json.dumps({"url": url, "status": status, "headers": kept}).encode("utf-8"))
+        except OSError as e:
+            logger.debug(f"Asset cache write failed for {url}: {e}")
+
+    async def serve(self, route) -> bool:
+        """Fulfil a static bundle from cache (fetching and storing it on a miss). False = not handled."""
+        request = route.request
+        if not self.cacheable(request):
+            return False
+        entry = self.get(request.url)
+        if entry is not None:
+            status, headers, body = entry
+            self._stats["asset_hits"] += 1
+            self._stats["asset_bytes_served"] += len(body)
+            self._served.add(request)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return True
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            return False
+        self._stats["asset_misses"] += 1
+        if response.status == 200:
+            self.put(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+        return True
+
+    def was_served(self, request) -> bool:
+        """True (once) if the request was answered from cache without touching the network."""
+        if request in self._served:
+            self._served.discard(request)
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+
+class TransferMeter:
+    """
+    Sums network bytes (headers + body) of finished requests on a context, in total
+    and per domain; cache hits are excluded.
+    """
+
+    def __init__(self, asset_cache: Optional[AssetCache] = None):
+        self.asset_cache = asset_cache
+        self.bytes_transferred = 0
+        self.requests = 0
+        self.domains: Dict[str, Dict[str, int]] = {}
+        self._pending: set = set()
+
+    def attach(self, context) -> None:
+        context.on("requestfinished", self._on_finished)
+
+    def _on_finished(self, request) -> None:
+        task = asyncio.ensure_future(self._count(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _count(self, request) -> None:
+        if self.asset_cache is not None and self.asset_cache.was_served(request):
+            return
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = int(sizes.get("responseBodySize", 0) or 0) + int(sizes.get("responseHeadersSize", 0) or 0)
+        self.requests += 1
+        self.bytes_transferred += size
+        domain = self.domains.setdefault((urlsplit(request.url).hostname or "-").lower(), {"requests": 0, "bytes": 0})
+        domain["requests"] += 1
+        domain["bytes"] += size
+
+    def get_stats(self, pages: int) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "bytes_transferred": self.bytes_transferred,
+            "bytes_per_page": round(self.bytes_transferred / pages) if pages else None,
+            # Heaviest domains first: what to add to a SCRAPER_BLOCK_*_DOMAINS list
+            "bytes_by_domain": {d: dict(c) for d, c in sorted(self.domains.items(), key=lambda kv: -kv[1]["bytes"])},
+        }
+        if self.asset_cache is not None:
+            served = self.asset_cache.get_stats()
+            stats.update(served)
+            # What the same pages would have cost without the asset cache
+            stats["bytes_per_page_uncached"] = round((self.bytes_transferred + served["asset_bytes_served"]) / pages) if pages else None
+        return stats
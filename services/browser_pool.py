@@ -0,0 +1,241 @@
+"""
+Browser Page Pool
+Warm Playwright pages shared by the scrapers. Request blocking follows one
+configurable policy per scrape kind (project vs map page) and is registered once
+per context; pages are reused across navigations, then recycled after N uses or
+when a lease ends in an error.
+"""
+
+import os
+import logging
+from urllib.parse import urlsplit
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# Resources the scrapers never need: images, fonts, media and map tiles
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PARTS = ["/tile/", "/tiles/", "/{z}/", "/wmts", "/arcgis/", "/basemaps/", "/mapbox/"]
+# Analytics, tag managers, ads and chat widgets seen on or typical for the site
+DEFAULT_DENY_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "analytics.google.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "facebook.net", "facebook.com", "connect.facebook.net",
+    "hotjar.com", "hotjar.io", "clarity.ms", "segment.io", "segment.com", "mixpanel.com",
+    "intercom.io", "intercomcdn.com", "hs-scripts.com", "hs-analytics.net", "hubspot.com",
+    "linkedin.com", "licdn.com", "twitter.com", "ads-twitter.com", "tiktok.com", "bing.com",
+    "sentry.io", "newrelic.com", "nr-data.net", "crisp.chat", "tawk.to",
+]
+
+# Per scrape kind defaults. Project pages are read from the DOM, so stylesheets are
+# dropped too; map pages keep them since the map library sizes its container with CSS.
+SCRAPE_KIND_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "project": {"types": BLOCKED_RESOURCE_TYPES | {"stylesheet", "texttrack", "manifest"}},
+    "map": {"types": BLOCKED_RESOURCE_TYPES | {"texttrack", "manifest"}},
+}
+
+
+def _env_list(name: str) -> Optional[List[str]]:
+    raw = os.getenv(name)
+    if raw is None:
+        return None
+    return [p.strip().lower() for p in raw.split(",") if p.strip()]
+
+
+def _domain_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _matches(host: str, domains) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class BlockingPolicy:
+    """
+    Request-blocking rules for one scrape kind, plus per-domain allowed/blocked counts.
+    A request is blocked if its resource type or domain is denied, its URL contains a
+    tile pattern, or an allowlist is set and its domain is not on it. Top-level
+    documents are never blocked. Overrides: SCRAPER_BLOCK_<KIND>_TYPES,
+    SCRAPER_BLOCK_<KIND>_DOMAINS, SCRAPER_ALLOW_<KIND>_DOMAINS (comma-separated).
+    """
+
+    def __init__(self, kind: str = "project", block_types=None, deny_domains=None,
+                 allow_domains=None, block_url_parts=None):
+        defaults = SCRAPE_KIND_DEFAULTS.get(kind, SCRAPE_KIND_DEFAULTS["project"])
+        env = kind.upper()
+        self.kind = kind
+        self.block_types = set(block_types if block_types is not None
+                               else _env_list(f"SCRAPER_BLOCK_{env}_TYPES") or defaults["types"])
+        self.deny_domains = list(deny_domains if deny_domains is not None
+                                 else _env_list(f"SCRAPER_BLOCK_{env}_DOMAINS") or DEFAULT_DENY_DOMAINS)
+        self.allow_domains = list(allow_domains if allow_domains is not None
+                                  else _env_list(f"SCRAPER_ALLOW_{env}_DOMAINS") or [])
+        self.block_url_parts = list(block_url_parts if block_url_parts is not None else BLOCKED_URL_PARTS)
+        self._domains: Dict[str, Dict[str, int]] = {}
+        self._reasons: Dict[str, int] = {}
+
+    def block_reason(self, request) -> Optional[str]:
+        """Why the request should be aborted, or None to let it through."""
+        rt = request.resource_type
+        if rt == "document" and request.is_navigation_request():
+            return None
+        host = _domain_of(request.url)
+        if rt in self.block_types:
+            return f"type:{rt}"
+        if _matches(host, self.deny_domains):
+            return "domain_denied"
+        if self.allow_domains and not _matches(host, self.allow_domains):
+            return "domain_not_allowed"
+        if any(p in request.url for p in self.block_url_parts):
+            return "url_pattern"
+        return None
+
+    def check(self, request) -> bool:
+        """Decide and count; True means block."""
+        reason = self.block_reason(request)
+        counts = self._domains.setdefault(_domain_of(request.url) or "-", {"allowed": 0, "blocked": 0})
+        if reason is None:
+            counts["allowed"] += 1
+            return False
+        counts["blocked"] += 1
+        self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": sum(c["allowed"] for c in self._domains.values()),
+            "blocked": sum(c["blocked"] for c in self._domains.values()),
+            "blocked_by_reason": dict(self._reasons),
+            "requests_by_domain": {d: dict(c) for d, c in sorted(
+                self._domains.items(), key=lambda kv: -(kv[1]["allowed"] + kv[1]["blocked"]))},
+        }
+
+
+def scrape_kind(url: str) -> str:
+    """Scrape kind of a page URL: 'map' for /map pages, otherwise 'project'."""
+    return "map" if urlsplit(url).path.rstrip("/").endswith("/map") else "project"
+
+
+def blocking_policies() -> Dict[str, BlockingPolicy]:
+    """One policy per scrape kind, configured from the environment."""
+    return {kind: BlockingPolicy(kind) for kind in SCRAPE_KIND_DEFAULTS}
+
+
+_DEFAULT_POLICY = BlockingPolicy("project")
+
+
+def _page_url(request) -> str:
+    try:
+        return request.frame.page.url or request.url
+    except Exception:
+        return request.url
+
+
+def make_route_handler(policy=None, asset_cache=None):
+    """
+    Context-level route handler. policy is a BlockingPolicy, or a dict of them keyed
+    by scrape kind (chosen from the requesting page's URL) for contexts that load
+    both project and map pages. With an AssetCache, static bundles are answered via
+    route.fulfill.
+    """
+    policy = policy if policy is not None else _DEFAULT_POLICY
+
+    async def handler(route):
+        request = route.request
+        chosen = policy
+        if isinstance(policy, dict):
+            chosen = policy.get(scrape_kind(_page_url(request))) or next(iter(policy.values()))
+        if chosen.check(request):
+            return await route.abort()
+        if asset_cache is not None and await asset_cache.serve(route):
+            return
+        return await route.continue_()
+    return handler
+
+
+async def apply_stealth(page) -> None:
+    """Apply playwright_stealth to a page if it is installed (best-effort)."""
+    try:
+        from playwright_stealth import stealth_async  # type: ignore
+    except Exception:
+        return
+    try:
+        await stealth_async(page)
+    except Exception:
+        pass
+
+
+@dataclass
+class PooledPage:
+    page: Any
+    uses: int = 0
+    broken: bool = False
+
+
+class PagePool:
+    """
+    Reusable pages on one browser context. Each concurrent caller leases one page,
+    so a worker keeps a warm page between GIDs instead of opening a new tab.
+    """
+
+    def __init__(self, context, max_uses: int = 25,
+                 on_new_page: Optional[Callable[[Any], Awaitable[None]]] = None):
+        self.context = context
+        self.max_uses = max(1, max_uses)
+        self.on_new_page = on_new_page
+        self._idle: List[PooledPage] = []
+        self._closed = False
+        self._stats: Dict[str, int] = {"pages_created": 0, "pages_recycled": 0, "pages_discarded": 0, "leases": 0}
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    async def _create(self) -> PooledPage:
+        page = await self.context.new_page()
+        if self.on_new_page:
+            try:
+                await self.on_new_page(page)
+            except Exception:
+                pass
+        self._stats["pages_created"] += 1
+        return PooledPage(page=page)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledPage]:
+        """Borrow a page for one navigation; set .broken to force a replacement."""
+        pooled = None
+        while self._idle and pooled is None:
+            candidate = self._idle.pop()
+            if not candidate.page.is_closed():
+                pooled = candidate
+        if pooled is None:
+            pooled = await self._create()
+        pooled.uses += 1
+        self._stats["leases"] += 1
+        try:
+            yield pooled
+        except BaseException:
+            pooled.broken = True
+            raise
+        finally:
+            await self._release(pooled)
+
+    async def _release(self, pooled: PooledPage) -> None:
+        if not (self._closed or pooled.broken or pooled.uses >= self.max_uses):
+            self._idle.append(pooled)
+            return
+        self._stats["pages_discarded" if pooled.broken else "pages_recycled"] += 1
+        try:
+            await pooled.page.close()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            try:
+                await pooled.page.close()
+            except Exception:
+                pass
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Shared Browser Server
+One long-lived Chromium that several scraper processes attach to, instead of
+each launching its own. Clients connect over CDP and open their own isolated
+context, so workers share one browser's memory and launch cost.
+
+Start it with:  python -m services.browser_server --port 9222
+then run scrapers with BROWSER_CDP_ENDPOINT=http://127.0.0.1:9222
+"""
+
+import os
+import json
+import signal
+import asyncio
+import argparse
+import logging
+from typing import Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ["--no-sandbox", "--disable-gpu"]
+ENDPOINT_FILE = os.path.join("outputs", "cache", "browser_server.json")
+
+
+async def launch_browser(pw, headless: bool = True) -> Tuple[Any, bool]:
+    """
+    Return (browser, shared). Connects to BROWSER_CDP_ENDPOINT when set and reachable,
+    otherwise launches a private Chromium. Shared browsers must not be closed by clients.
+    """
+    endpoint = os.getenv('BROWSER_CDP_ENDPOINT')
+    if endpoint:
+        try:
+            browser = await pw.chromium.connect_over_cdp(endpoint, timeout=10000)
+            return browser, True
+        except Exception as e:
+            logger.warning(f"Shared browser at {endpoint} unavailable, launching a private one: {e}")
+    browser = await pw.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+    return browser, False
+
+
+async def release_browser(browser, shared: bool) -> None:
+    """Close a private browser; for a shared one only our own contexts go away (pw.stop disconnects)."""
+    if browser is None or shared:
+        return
+    try:
+        await browser.close()
+    except Exception:
+        pass
+
+
+async def serve(port: int, headless: bool = True) -> None:
+    from playwright.async_api import async_playwright
+
+    pw = await async_playwright().start()
+    browser = await pw.chromium.launch(
+        headless=headless,
+        args=LAUNCH_ARGS + [f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1"],
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    os.makedirs(os.path.dirname(ENDPOINT_FILE), exist_ok=True)
+    with open(ENDPOINT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"endpoint": endpoint, "pid": os.getpid()}, f)
+    print(f"🌐 Shared browser listening at {endpoint} (export BROWSER_CDP_ENDPOINT={endpoint})", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    browser.on("disconnected", lambda _: stop.set())
+    try:
+        await stop.wait()
+    finally:
+        try:
+            os.remove(ENDPOINT_FILE)
+        except OSError:
+            pass
+        try:
+            await browser.close()
+        except Exception:
+            pass
+        await pw.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run one Chromium shared by scraper processes over CDP")
+    parser.add_argument("--port", type=int, default=int(os.getenv('BROWSER_SERVER_PORT', '9222')))
+    parser.add_argument("--headful", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, headless=not args.headful))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Browser Memory Watchdog
+Counts pages served by a Playwright browser and samples the RSS of the owner's
+own browser tree (driver, Chromium and its renderers) with psutil. Other
+browsers in the process and CDP-shared browsers are not counted.
+Tells the owner when to recycle its context (every N pages) or restart the
+browser (RSS above a threshold), and keeps restart counters for metrics.
+"""
+
+import os
+import logging
+from typing import Optional, Dict, Any, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+RECYCLE_CONTEXT = "context"
+RESTART_BROWSER = "browser"
+
+
+def child_processes() -> Dict[int, int]:
+    """{pid: parent pid} of this interpreter's descendant processes; empty without psutil."""
+    try:
+        import psutil
+    except Exception:
+        return {}
+    children: Dict[int, int] = {}
+    for child in psutil.Process().children(recursive=True):
+        try:
+            children[child.pid] = child.ppid()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return children
+
+
+def browser_tree_rss_mb(root_pids: Iterable[int]) -> Optional[float]:
+    """Total RSS (MB) of the given processes and their descendants, or None without psutil."""
+    try:
+        import psutil
+    except Exception:
+        return None
+    total = 0
+    for pid in root_pids:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    return total / (1024 * 1024)
+
+
+class BrowserWatchdog:
+    """Page counter plus periodic RSS sampling that decides when to recycle."""
+
+    def __init__(self, max_pages: Optional[int] = None, max_rss_mb: Optional[float] = None, sample_every: int = 5):
+        self.max_pages = max_pages if max_pages is not None else int(os.getenv('SCRAPER_RECYCLE_PAGES', '200'))
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else float(os.getenv('SCRAPER_MAX_BROWSER_RSS_MB', '2048'))
+        self.sample_every = max(1, sample_every)
+        self.pages_total = 0
+        self.pages_since_recycle = 0
+        self.context_recycles = 0
+        self.browser_restarts = 0
+        self.last_rss_mb: Optional[float] = None
+        self.peak_rss_mb: float = 0.0
+        # Roots of the owner's browser tree (the Playwright driver it started); empty = not measured
+        self.root_pids: Set[int] = set()
+        self.shared = False
+
+    def browser_started(self, before: Dict[int, int], shared: bool = False) -> None:
+        """
+        Track the processes started since `before` (a child_processes() snapshot taken
+        just ahead of the launch) as the browser tree. A shared (CDP) browser runs
+        elsewhere and is never ours to restart, so its RSS is not checked.
+        """
+        self.shared = shared
+        new = {pid: ppid for pid, ppid in child_processes().items() if pid not in before}
+        self.root_pids = set() if shared else {pid for pid, ppid in new.items() if ppid not in new}
+
+    def sample(self) -> Optional[float]:
+        if self.shared or not self.root_pids:
+            return None
+        rss = browser_tree_rss_mb(self.root_pids)
+        if rss is not None:
+            self.last_rss_mb = rss
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return rss
+
+    def page_done(self) -> Optional[str]:
+        """Count one page; return RESTART_BROWSER, RECYCLE_CONTEXT or None."""
+        self.pages_total += 1
+        self.pages_since_recycle += 1
+        if self.max_rss_mb > 0 and self.pages_total % self.sample_every == 0:
+            rss = self.sample()
+            if rss is not None and rss > self.max_rss_mb:
+                return RESTART_BROWSER
+        if self.max_pages > 0 and self.pages_since_recycle >= self.max_pages:
+            return RECYCLE_CONTEXT
+        return None
+
+    def recycled(self, action: str) -> None:
+        self.pages_since_recycle = 0
+        if action == RESTART_BROWSER:
+            self.browser_restarts += 1
+        else:
+            self.context_recycles += 1
+        logger.info(f"Browser {'restarted' if action == RESTART_BROWSER else 'context recycled'}",
+                    extra={"pages_total": self.pages_total, "rss_mb": self.last_rss_mb})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "watchdog_pages": self.pages_total,
+            "watchdog_context_recycles": self.context_recycles,
+            "watchdog_browser_restarts": self.browser_restarts,
+            "watchdog_last_rss_mb": round(self.last_rss_mb, 1) if self.last_rss_mb is not None else None,
+            "watchdog_peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
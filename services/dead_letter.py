@@ -0,0 +1,104 @@
+"""
+Dead-Letter Queue
+Failed GIDs are parked here with a classified reason instead of being retried
+inline; transient reasons are retried once at the end of a run with escalated
+timeouts and lower concurrency, so one sick page never holds a worker slot
+during the main pass.
+"""
+
+import time
+import asyncio
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, List
+
+# Failure reasons, coarsest first
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+NAVIGATION_ERROR = "navigation_error"
+NETWORK_ERROR = "network_error"
+NO_DATA = "no_data"
+PARSE_ERROR = "parse_error"
+UNKNOWN = "unknown"
+
+# Worth a second attempt with longer timeouts; no_data/parse_error would fail the same way
+RETRYABLE = {TIMEOUT, THROTTLED, NAVIGATION_ERROR, NETWORK_ERROR, UNKNOWN}
+
+
+class ScrapeDeferred(Exception):
+    """Raised on a main-pass failure that should go to the dead-letter queue."""
+
+    def __init__(self, reason: str, message: str = ""):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+def classify_failure(exc: Optional[BaseException] = None, status: Optional[int] = None) -> str:
+    """Map an exception and/or HTTP status to one of the failure reasons above."""
+    if isinstance(exc, ScrapeDeferred):
+        return exc.reason
+    if status in (429, 503):
+        return THROTTLED
+    if exc is None:
+        return NO_DATA if status in (None, 200) else NAVIGATION_ERROR
+    name = type(exc).__name__
+    text = str(exc).lower()
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "timeout" in name.lower() or "timed out" in text:
+        return TIMEOUT
+    if "net::err" in text or isinstance(exc, (ConnectionError, OSError)) or "connection" in name.lower():
+        return NETWORK_ERROR
+    if "navigat" in text or "goto" in text:
+        return NAVIGATION_ERROR
+    # AttributeError is left out: here it usually means a None page/element after a timeout or detach
+    if isinstance(exc, (ValueError, KeyError, IndexError)):
+        return PARSE_ERROR
+    return UNKNOWN
+
+
+def is_retryable(reason: str) -> bool:
+    return reason in RETRYABLE
+
+
+@dataclass
+class DeadLetter:
+    gid: str
+    reason: str
+    error: str = ""
+    attempts: int = 1
+    failed_at: float = field(default_factory=time.time)
+
+
+class DeadLetterQueue:
+    """Thread-safe holding area for failed GIDs (one entry per GID)."""
+
+    def __init__(self):
+        self._items: Dict[str, DeadLetter] = {}
+        self._lock = threading.Lock()
+        self._reasons: Dict[str, int] = {}
+
+    def add(self, gid: str, reason: str, error: Any = "") -> None:
+        with self._lock:
+            gid = str(gid)
+            if gid in self._items:
+                self._items[gid].attempts += 1
+                self._items[gid].reason = reason
+            else:
+                self._items[gid] = DeadLetter(gid=gid, reason=reason, error=str(error)[:500])
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def drain(self) -> List[DeadLetter]:
+        with self._lock:
+            items, self._items = list(self._items.values()), {}
+        return items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def reason_counts(self) -> Dict[str, int]:
+        """Failures per reason seen so far (including drained entries)."""
+        with self._lock:
+            return dict(self._reasons)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [asdict(d) for d in self._items.values()]
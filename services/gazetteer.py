@@ -0,0 +1,201 @@
+"""
+Gazetteer Resolver
+Precomputed, in-memory lookup for admin-region location strings such as
+"Western Australia, Australia". Built from countries.json plus admin-1 names
+(boundary GeoJSON and/or a flat gazetteer JSON), so the common "State, Country"
+strings never need a network forward geocode. Only entries with a centroid are
+answered locally; bare country names go to the cache/network geocoder. No admin-1
+data is bundled, so without an admin-1 GeoJSON or flat gazetteer file it resolves
+nothing (GeocodingService only enables it by default when one is configured).
+"""
+
+import os
+import json
+import re
+import unicodedata
+import logging
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Common spellings seen in MiningHub location strings -> countries.json names
+COUNTRY_ALIASES = {
+    'usa': 'United States of America',
+    'us': 'United States of America',
+    'united states': 'United States of America',
+    'uk': 'United Kingdom',
+    'great britain': 'United Kingdom',
+    'drc': 'Democratic Republic of the Congo',
+    'dr congo': 'Democratic Republic of the Congo',
+    'ivory coast': "Côte d'Ivoire",
+    'russian federation': 'Russia',
+    'republic of korea': 'South Korea',
+}
+
+# Admin-1 property names (same conventions as services.offline_geocoder)
+_STATE_KEYS = ('name', 'name_en', 'NAME_1', 'shapeName')
+_COUNTRY_KEYS = ('admin', 'country', 'NAME_0', 'COUNTRY', 'geonunit', 'shapeGroupName')
+_ISO_KEYS = ('iso_3166_2', 'ISO_1', 'HASC_1', 'shapeISO')
+
+
+def normalize_place(s: str) -> str:
+    """Lowercase, strip accents/punctuation and collapse whitespace."""
+    s = unicodedata.normalize('NFKD', s or '')
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    s = re.sub(r"[^\w\s,]", ' ', s)
+    return ' '.join(s.split())
+
+
+def _first(props: Dict[str, Any], keys: Iterable[str]) -> Optional[str]:
+    for k in keys:
+        v = props.get(k)
+        if v not in (None, '', '-99', -99):
+            return str(v)
+    return None
+
+
+def _bbox_center(geometry: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Cheap representative point (bbox centre) when shapely is unavailable."""
+    xs: List[float] = []
+    ys: List[float] = []
+
+    def walk(coords):
+        if coords and isinstance(coords[0], (int, float)):
+            xs.append(coords[0])
+            ys.append(coords[1])
+        else:
+            for c in coords or []:
+                walk(c)
+
+    walk((geometry or {}).get('coordinates'))
+    if not xs:
+        return None
+    return (min(ys) + max(ys)) / 2.0, (min(xs) + max(xs)) / 2.0
+
+
+class Gazetteer:
+    """
+    O(1) resolver from normalised location strings to country, state,
+    ISO3166-2 and a representative centroid.
+    """
+
+    def __init__(self):
+        self.countries: Dict[str, str] = {}
+        self.regions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # State name alone -> entry, only kept when unambiguous across countries
+        self._state_only: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    @classmethod
+    def build(cls, countries_path: str = "countries.json", admin1_path: Optional[str] = None,
+              gazetteer_path: Optional[str] = None) -> 'Gazetteer':
+        gaz = cls()
+        gaz._load_countries(countries_path)
+        if admin1_path:
+            gaz._load_admin1_geojson(admin1_path)
+        if gazetteer_path:
+            gaz._load_flat(gazetteer_path)
+        logger.info(f"Gazetteer built: {len(gaz.countries)} country names, {len(gaz.regions)} admin-1 regions")
+        return gaz
+
+    def _load_countries(self, path: str) -> None:
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    for name in json.load(f).get('country', []):
+                        self.countries[normalize_place(name)] = name
+        except Exception as e:
+            logger.warning(f"Failed to load countries for gazetteer: {e}")
+        for alias, name in COUNTRY_ALIASES.items():
+            self.countries.setdefault(normalize_place(alias), name)
+
+    def _canonical_country(self, name: Optional[str]) -> Optional[str]:
+        if not name:
+            return None
+        return self.countries.get(normalize_place(name), name)
+
+    def add_region(self, country: str, state: str, iso3166_2: Optional[str] = None,
+                   lat: Optional[float] = None, lon: Optional[float] = None) -> None:
+        country = self._canonical_country(country)
+        if not (country and state):
+            return
+        self.countries.setdefault(normalize_place(country), country)
+        entry = {'country': country, 'state': state, 'iso3166_2': iso3166_2, 'lat': lat, 'lon': lon}
+        self.regions[(normalize_place(state), normalize_place(country))] = entry
+        key = normalize_place(state)
+        if key in self._state_only:
+            prev = self._state_only[key]
+            if prev is None or prev['country'] != country:
+                self._state_only[key] = None
+                return
+        self._state_only[key] = entry
+
+    def _load_admin1_geojson(self, path: str) -> None:
+        if not os.path.exists(path):
+            logger.warning(f"Gazetteer admin-1 dataset not found: {path}")
+            return
+        try:
+            try:
+                from shapely.geometry import shape
+            except Exception:
+                shape = None
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for feat in data.get('features', []):
+                props = feat.get('properties') or {}
+                center = None
+                if shape is not None:
+                    try:
+                        pt = shape(feat.get('geometry')).representative_point()
+                        center = (pt.y, pt.x)
+                    except Exception:
+                        center = None
+                center = center or _bbox_center(feat.get('geometry'))
+                self.add_region(
+                    _first(props, _COUNTRY_KEYS), _first(props, _STATE_KEYS), _first(props, _ISO_KEYS),
+                    lat=center[0] if center else None, lon=center[1] if center else None,
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load admin-1 names for gazetteer: {e}")
+
+    def _load_flat(self, path: str) -> None:
+        """Load a JSON list of {country, state, iso3166_2, lat, lon} records."""
+        if not os.path.exists(path):
+            logger.warning(f"Gazetteer file not found: {path}")
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for rec in json.load(f):
+                    self.add_region(rec.get('country'), rec.get('state'), rec.get('iso3166_2'),
+                                    lat=rec.get('lat'), lon=rec.get('lon'))
+        except Exception as e:
+            logger.warning(f"Failed to load gazetteer file: {e}")
+
+    def lookup(self, location: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve an admin-region string. Returns the compact geocoder result shape
+        ({'lat', 'lon', 'address': {...}}) or None for free-text locations and for
+        entries without a centroid (e.g. bare country names), so those fall through
+        to the cache and network geocoder and still get coordinates.
+        """
+        norm = normalize_place(location)
+        if not norm:
+            return None
+        parts = [p.strip() for p in norm.split(',') if p.strip()]
+        entry = None
+        if len(parts) >= 2:
+            country = self.countries.get(parts[-1])
+            if not country:
+                return None
+            entry = self.regions.get((parts[-2], normalize_place(country)))
+            if entry is None:
+                # Free text before the country; leave it to the network geocoder
+                return None
+        elif parts[0] not in self.countries:
+            entry = self._state_only.get(parts[0])
+        # A result without coordinates would mark the project geocoded with no lat/lon
+        if not entry or entry.get('lat') is None or entry.get('lon') is None:
+            return None
+        address = {'country': entry['country'], 'state': entry['state']}
+        if entry.get('iso3166_2'):
+            address['ISO3166-2-lvl4'] = entry['iso3166_2']
+        return {'lat': entry['lat'], 'lon': entry['lon'], 'address': address, 'gazetteer': True}
@@ -1,17 +1,28 @@
 """
 Geocoding Service
 Provides reverse/forward geocoding with caching, English results, and polite rate limiting.
+All provider requests go through a single worker thread that owns the throttle;
+callers submit lookups and receive futures.
 """
 
 import os
-import json
 import time
+import queue
+import threading
 import logging
-from typing import Optional, Dict, Any
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Tuple, List, Sequence
 from dataclasses import dataclass
 
 import requests
 
+from services.geocoding_cache import GeocodeCacheStore, ProximityIndex, compact_result
+
+try:
+    import fcntl  # POSIX only; used for the cross-process throttle
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,20 +32,171 @@ class GeocodingConfig:
     delay_seconds: float = 1.0
     cache_dir: str = os.path.join("outputs", "cache")
     timeout: int = 10
+    # Share the request throttle with other processes using the same cache_dir
+    shared_throttle: bool = True
+    # Reuse a cached reverse result within this distance (0 disables proximity reuse)
+    proximity_radius_km: float = float(os.getenv('GEOCODE_PROXIMITY_KM', '1.0'))
+    # All cached points within radius * factor must agree on country/state/county
+    proximity_confidence_factor: float = 2.5
+    # ...and at least this many distinct cached points must lie within the radius
+    proximity_min_neighbours: int = int(os.getenv('GEOCODE_PROXIMITY_MIN_NEIGHBOURS', '2'))
+    # Offline admin-boundary GeoJSON (admin-1 required, admin-2 optional); Nominatim becomes the fallback
+    offline_admin1_path: str = os.getenv('GEOCODE_ADMIN1_PATH', '')
+    offline_admin2_path: str = os.getenv('GEOCODE_ADMIN2_PATH', '')
+    # Local gazetteer for "State, Country" strings (countries.json + admin-1 names with centroids).
+    # None = auto: on only when GEOCODE_ADMIN1_PATH or GEOCODE_GAZETTEER_PATH supplies regions,
+    # since countries.json alone has no coordinates and would never answer
+    enable_gazetteer: Optional[bool] = {'true': True, 'false': False}.get(os.getenv('GEOCODE_GAZETTEER', 'auto').lower())
+    countries_path: str = "countries.json"
+    gazetteer_path: str = os.getenv('GEOCODE_GAZETTEER_PATH', '')
+
+
+class RequestThrottle:
+    """
+    Enforces a minimum interval between request starts.
+    Thread-safe, and process-safe when given a lock file (POSIX flock):
+    the last request timestamp lives in the file, so every process on the host
+    that points at it shares one rate budget.
+    """
+
+    def __init__(self, delay_seconds: float, lock_path: Optional[str] = None):
+        self.delay_seconds = delay_seconds
+        self.lock_path = lock_path if fcntl else None
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            if not self.lock_path:
+                self._last = self._sleep_until_due(self._last)
+                return
+            try:
+                with open(self.lock_path, 'a+') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        f.seek(0)
+                        raw = f.read().strip()
+                        last = max(float(raw) if raw else 0.0, self._last)
+                        self._last = self._sleep_until_due(last)
+                        f.seek(0)
+                        f.truncate()
+                        f.write(repr(self._last))
+                        f.flush()
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Shared throttle unavailable, using in-process throttle: {e}")
+                self._last = self._sleep_until_due(self._last)
+
+    def _sleep_until_due(self, last: float) -> float:
+        elapsed = time.time() - last
+        if elapsed < self.delay_seconds:
+            time.sleep(self.delay_seconds - elapsed)
+        return time.time()
+
+
+class GeocodingWorker:
+    """
+    Single background thread that executes provider lookups in FIFO order.
+    Identical keys already queued or in flight share one future.
+    """
+
+    def __init__(self, name: str = "geocoding-worker"):
+        self._queue: "queue.Queue[Optional[Tuple[str, Callable, tuple, Future]]]" = queue.Queue()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: str, fn: Callable, *args) -> Future:
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut
+            fut = Future()
+            if self._closed:
+                fut.cancel()
+                return fut
+            self._inflight[key] = fut
+            self._queue.put((key, fn, args, fut))
+        return fut
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            key, fn, args, fut = item
+            try:
+                if fut.set_running_or_notify_cancel():
+                    fut.set_result(fn(*args))
+            except Exception as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def close(self) -> None:
+        """
+        Cancel lookups still queued, then wait for the one in progress (bounded by the
+        HTTP timeout), so nothing touches the cache after this returns.
+        """
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    key, _, _, fut = item
+                    fut.cancel()
+                    self._inflight.pop(key, None)
+            self._queue.put(None)
+        self._thread.join()
 
 
 class GeocodingService:
     """
-    Stateless geocoding client with local file cache and 1s rate limit.
-    Returns raw provider JSON; enrichment layer maps fields.
+    Stateless geocoding client with append-only local cache and 1s rate limit.
+    Returns compacted provider JSON (lat/lon + used address fields); enrichment layer maps fields.
     """
 
     def __init__(self, config: Optional[GeocodingConfig] = None):
         self.config = config or GeocodingConfig()
-        os.makedirs(self.config.cache_dir, exist_ok=True)
-        self.cache_path = os.path.join(self.config.cache_dir, "geocoding_cache.json")
-        self.cache: Dict[str, Any] = self._load_cache()
-        self.last_request_time = 0.0
+        self.cache = GeocodeCacheStore(self.config.cache_dir)
+        lock_path = os.path.join(self.config.cache_dir, "nominatim.throttle") if self.config.shared_throttle else None
+        self.throttle = RequestThrottle(self.config.delay_seconds, lock_path=lock_path)
+        self._worker: Optional[GeocodingWorker] = None
+        self._worker_lock = threading.Lock()
+        self.proximity = ProximityIndex(self.config.proximity_radius_km, self.config.proximity_confidence_factor,
+                                        self.config.proximity_min_neighbours)
+        indexed = self.proximity.load_from_store(self.cache) if self.proximity.enabled else 0
+        self._stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self.offline = None
+        if self.config.offline_admin1_path:
+            from services.offline_geocoder import OfflineBoundaryGeocoder
+            offline = OfflineBoundaryGeocoder(self.config.offline_admin1_path, self.config.offline_admin2_path or None)
+            self.offline = offline if offline.enabled else None
+        self.gazetteer = None
+        has_regions = bool(self.config.offline_admin1_path or self.config.gazetteer_path)
+        enable_gazetteer = self.config.enable_gazetteer if self.config.enable_gazetteer is not None else has_regions
+        if enable_gazetteer and not has_regions:
+            logger.warning("Gazetteer enabled without GEOCODE_ADMIN1_PATH or GEOCODE_GAZETTEER_PATH; "
+                           "it has no region centroids and will not resolve any location")
+        if enable_gazetteer:
+            from services.gazetteer import Gazetteer
+            self.gazetteer = Gazetteer.build(
+                countries_path=self.config.countries_path,
+                admin1_path=self.config.offline_admin1_path or None,
+                gazetteer_path=self.config.gazetteer_path or None,
+            )
+        logger.debug(f"Geocoding cache ready: {len(self.cache)} entries, {indexed} indexed for proximity reuse")
         self.session = requests.Session()
         # Force English responses
         self.session.headers.update({
@@ -42,38 +204,118 @@ class GeocodingService:
             'Accept-Language': 'en-US,en;q=0.9'
         })
 
-    def _load_cache(self) -> Dict[str, Any]:
-        try:
-            if os.path.exists(self.cache_path):
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load geocoding cache: {e}")
-        return {}
+    @property
+    def worker(self) -> GeocodingWorker:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = GeocodingWorker()
+            return self._worker
 
-    def _save_cache(self) -> None:
-        try:
-            with open(self.cache_path, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False)
-        except Exception as e:
-            logger.warning(f"Failed to save geocoding cache: {e}")
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] = self._stats.get(name, 0) + 1
 
-    def _respect_rate_limit(self) -> None:
-        now = time.time()
-        elapsed = now - self.last_request_time
-        if elapsed < self.config.delay_seconds:
-            time.sleep(self.config.delay_seconds - elapsed)
+    def get_stats(self) -> Dict[str, Any]:
+        """Lookup counters and hit rates for observability."""
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        for kind in ('reverse', 'forward'):
+            total = stats.get(f"{kind}_lookups", 0)
+            hits = sum(stats.get(f"{kind}_{src}_hits", 0) for src in ('cache', 'offline', 'proximity', 'gazetteer'))
+            stats[f"{kind}_hit_rate"] = round(hits / total, 4) if total else 0.0
+        return stats
 
-    def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
-        if latitude is None or longitude is None:
-            return None
+    @staticmethod
+    def _completed(value: Any) -> Future:
+        fut: Future = Future()
+        fut.set_result(value)
+        return fut
+
+    @staticmethod
+    def _reverse_key(latitude: float, longitude: float) -> str:
         # Use full precision string keys to avoid precision loss
-        key = f"rev:{latitude:.8f},{longitude:.8f}"
+        return f"rev:{latitude:.8f},{longitude:.8f}"
+
+    @staticmethod
+    def _forward_key(location: str) -> Tuple[str, str]:
+        norm = ' '.join(location.strip().split())
+        return f"fwd:{norm.lower()}", norm
+
+    def submit_reverse(self, latitude: float, longitude: float) -> Future:
+        """Queue a reverse lookup; cache hits resolve immediately."""
+        if latitude is None or longitude is None:
+            return self._completed(None)
+        self._count('reverse_lookups')
+        key = self._reverse_key(latitude, longitude)
         if key in self.cache:
-            return self.cache[key]
+            self._count('reverse_cache_hits')
+            return self._completed(self.cache.get(key))
+        if self.offline:
+            local = self.offline.reverse(latitude, longitude)
+            if local:
+                self._count('reverse_offline_hits')
+                return self._completed(local)
+        nearby = self.proximity.lookup(latitude, longitude)
+        if nearby:
+            self._count('reverse_proximity_hits')
+            return self._completed(nearby)
+        self._count('reverse_misses')
+        return self.worker.submit(key, self._fetch_reverse, key, latitude, longitude)
+
+    def submit_forward(self, location: str) -> Future:
+        """Queue a forward lookup; cache hits resolve immediately."""
+        if not location:
+            return self._completed(None)
+        self._count('forward_lookups')
+        if self.gazetteer:
+            local = self.gazetteer.lookup(location)
+            if local:
+                self._count('forward_gazetteer_hits')
+                return self._completed(local)
+        key, norm = self._forward_key(location)
+        if key in self.cache:
+            self._count('forward_cache_hits')
+            return self._completed(self.cache.get(key))
+        self._count('forward_misses')
+        return self.worker.submit(key, self._fetch_forward, key, norm)
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        return self.submit_reverse(latitude, longitude).result()
+
+    def reverse_geocode_many(self, coords: Sequence[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Resolve many (lat, lon) pairs: one vectorized offline query for the batch,
+        then cache/proximity/network lookups only for points it could not place.
+        """
+        coords = list(coords)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(coords)
+        futures: Dict[int, Future] = {}
+        offline_results: List[Optional[Dict[str, Any]]] = [None] * len(coords)
+        if self.offline:
+            todo = [i for i, (lat, lon) in enumerate(coords)
+                    if lat is not None and lon is not None and self._reverse_key(lat, lon) not in self.cache]
+            for i, res in zip(todo, self.offline.reverse_many([coords[i] for i in todo])):
+                offline_results[i] = res
+        for i, (lat, lon) in enumerate(coords):
+            if offline_results[i]:
+                self._count('reverse_lookups')
+                self._count('reverse_offline_hits')
+                results[i] = offline_results[i]
+            else:
+                futures[i] = self.submit_reverse(lat, lon)
+        for i, fut in futures.items():
+            results[i] = fut.result()
+        return results
+
+    def forward_geocode(self, location: str) -> Optional[Dict[str, Any]]:
+        return self.submit_forward(location).result()
 
+    def _fetch_reverse(self, key: str, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        # A duplicate may have been queued before the first one finished
+        if key in self.cache:
+            return self.cache.get(key)
         try:
-            self._respect_rate_limit()
+            self.throttle.wait()
             params = {
                 'lat': f"{latitude:.8f}",
                 'lon': f"{longitude:.8f}",
@@ -82,29 +324,23 @@ class GeocodingService:
                 'zoom': 10
             }
             resp = self.session.get("https://nominatim.openstreetmap.org/reverse", params=params, timeout=self.config.timeout)
-            self.last_request_time = time.time()
             if resp.status_code == 200:
-                data = resp.json()
-                self.cache[key] = data
-                self._save_cache()
+                data = compact_result(resp.json())
+                self.cache.put(key, data)
+                self.proximity.add(latitude, longitude, data)
                 return data
             logger.warning(f"Reverse geocode failed: {resp.status_code}")
         except Exception as e:
             logger.warning(f"Reverse geocode error: {e}")
-        self.cache[key] = None
-        self._save_cache()
+        # Transient failure: remember for this run only so the next run retries
+        self.cache.put(key, None, persist=False)
         return None
 
-    def forward_geocode(self, location: str) -> Optional[Dict[str, Any]]:
-        if not location:
-            return None
-        norm = ' '.join(location.strip().split())
-        key = f"fwd:{norm.lower()}"
+    def _fetch_forward(self, key: str, norm: str) -> Optional[Dict[str, Any]]:
         if key in self.cache:
-            return self.cache[key]
-
+            return self.cache.get(key)
         try:
-            self._respect_rate_limit()
+            self.throttle.wait()
             params = {
                 'q': norm,
                 'format': 'json',
@@ -112,18 +348,26 @@ class GeocodingService:
                 'limit': 1
             }
             resp = self.session.get("https://nominatim.openstreetmap.org/search", params=params, timeout=self.config.timeout)
-            self.last_request_time = time.time()
             if resp.status_code == 200:
                 arr = resp.json()
-                data = arr[0] if isinstance(arr, list) and arr else None
-                self.cache[key] = data
-                self._save_cache()
+                data = compact_result(arr[0]) if isinstance(arr, list) and arr else None
+                self.cache.put(key, data)
                 return data
             logger.warning(f"Forward geocode failed: {resp.status_code}")
         except Exception as e:
             logger.warning(f"Forward geocode error: {e}")
-        self.cache[key] = None
-        self._save_cache()
+        self.cache.put(key, None, persist=False)
         return None
 
-
+    def close(self) -> None:
+        """Stop the worker (queued lookups are cancelled), then flush and close the cache file and HTTP session."""
+        logger.info("Geocoding stats", extra=self.get_stats())
+        with self._worker_lock:
+            if self._worker is not None:
+                self._worker.close()
+                self._worker = None
+        self.cache.close()
+        try:
+            self.session.close()
+        except Exception:
+            pass
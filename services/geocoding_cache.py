@@ -0,0 +1,238 @@
+"""
+Geocoding Cache Store
+Append-only JSON Lines cache for geocoding results.
+Each lookup appends one compact line instead of rewriting the whole cache file,
+and a single lock serialises writers so assembly threads can share one store.
+Also provides a grid-based proximity index so clustered projects can reuse a
+nearby reverse-geocode result instead of issuing another rate-limited request.
+"""
+
+import os
+import json
+import math
+import threading
+import logging
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Only these address fields are consumed by the enrichment layer
+ADDRESS_FIELDS = (
+    'country', 'country_code', 'state', 'state_district', 'region', 'province',
+    'territory', 'county', 'postcode', 'ISO3166-2-lvl4', 'ISO3166-2-lvl6',
+)
+
+
+def compact_result(data: Any) -> Optional[Dict[str, Any]]:
+    """Reduce a raw Nominatim result to lat/lon plus the address fields we use."""
+    if not isinstance(data, dict):
+        return None
+    out: Dict[str, Any] = {}
+    for key in ('lat', 'lon'):
+        if data.get(key) is not None:
+            out[key] = data[key]
+    addr = data.get('address')
+    if isinstance(addr, dict):
+        out['address'] = {k: addr[k] for k in ADDRESS_FIELDS if addr.get(k)}
+    return out
+
+
+class GeocodeCacheStore:
+    """
+    Thread-safe key/value cache backed by an append-only JSONL file.
+    Later lines win on load; the file is rewritten only when compacting.
+    """
+
+    def __init__(self, cache_dir: str, filename: str = "geocoding_cache.jsonl",
+                 legacy_filename: Optional[str] = "geocoding_cache.json"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.legacy_path = os.path.join(cache_dir, legacy_filename) if legacy_filename else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self._fh = None
+        self._load()
+
+    def _load(self) -> None:
+        lines = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            # Torn write from an interrupted run; skip it
+                            continue
+                        self._entries[rec['k']] = rec.get('v')
+                        lines += 1
+            except Exception as e:
+                logger.warning(f"Failed to load geocoding cache: {e}")
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+            return
+
+        # Rewrite when superseded lines dominate the log
+        if lines > 2 * max(len(self._entries), 1000):
+            self.compact()
+
+    def _migrate_legacy(self) -> None:
+        """Import the old whole-file JSON cache once, compacting entries."""
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            for key, value in (legacy or {}).items():
+                self._entries[key] = compact_result(value)
+            self.compact()
+            logger.info(f"Migrated {len(self._entries)} geocoding cache entries from {os.path.basename(self.legacy_path)}")
+        except Exception as e:
+            logger.warning(f"Failed to migrate legacy geocoding cache: {e}")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._entries.get(key, default)
+
+    def items(self) -> Iterator:
+        return iter(list(self._entries.items()))
+
+    def put(self, key: str, value: Any, persist: bool = True) -> None:
+        """Store a value; persist=False keeps it in memory for this run only."""
+        with self._lock:
+            self._entries[key] = value
+            if not persist:
+                return
+            try:
+                if self._fh is None:
+                    self._fh = open(self.path, 'a', encoding='utf-8')
+                self._fh.write(json.dumps({'k': key, 'v': value}, ensure_ascii=False) + "\n")
+                self._fh.flush()
+            except Exception as e:
+                logger.warning(f"Failed to append geocoding cache entry: {e}")
+
+    def compact(self) -> None:
+        """Atomically rewrite the log with one line per live key."""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            try:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for key, value in self._entries.items():
+                        f.write(json.dumps({'k': key, 'v': value}, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Failed to compact geocoding cache: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except Exception:
+                    pass
+                self._fh = None
+
+
+# Fields safe to reuse from a nearby point; finer ones (postcode) are dropped
+PROXIMITY_FIELDS = (
+    'country', 'country_code', 'state', 'state_district', 'region', 'province',
+    'territory', 'county', 'ISO3166-2-lvl4', 'ISO3166-2-lvl6',
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    r = 6371.0088
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ProximityIndex:
+    """
+    Quantized lat/lon grid over reverse-geocoded points for nearest-neighbour reuse.
+    A nearby result is reused only when the boundary confidence is high, i.e. at least
+    min_neighbours distinct indexed points lie within radius_km and every point within
+    radius_km * confidence_factor agrees on country/state/county. A single neighbour
+    says nothing about where the boundary is, so it is never enough on its own.
+    """
+
+    def __init__(self, radius_km: float, confidence_factor: float = 2.5, min_neighbours: int = 2):
+        self.radius_km = radius_km
+        self.search_km = radius_km * max(confidence_factor, 1.0)
+        self.min_neighbours = max(1, min_neighbours)
+        # Cell edge in degrees of latitude equal to the search radius
+        self.cell_deg = max(self.search_km / 111.32, 1e-6)
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.radius_km > 0
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def add(self, lat: float, lon: float, result: Optional[Dict[str, Any]]) -> None:
+        if not self.enabled or not result or not result.get('address'):
+            return
+        addr = {k: v for k, v in result['address'].items() if k in PROXIMITY_FIELDS}
+        if not (addr.get('country') or addr.get('state')):
+            return
+        with self._lock:
+            self._cells.setdefault(self._cell(lat, lon), []).append((lat, lon, addr))
+
+    def load_from_store(self, store: 'GeocodeCacheStore') -> int:
+        """Index every cached reverse result (keys look like 'rev:lat,lon')."""
+        count = 0
+        for key, value in store.items():
+            if not key.startswith('rev:') or not value:
+                continue
+            try:
+                lat_s, lon_s = key[4:].split(',', 1)
+                self.add(float(lat_s), float(lon_s), value)
+                count += 1
+            except ValueError:
+                continue
+        return count
+
+    def lookup(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Return a reusable compact result for (lat, lon) or None."""
+        if not self.enabled:
+            return None
+        row, col = self._cell(lat, lon)
+        # Longitude degrees shrink towards the poles; widen the column search to compensate
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        col_span = int(math.ceil(1.0 / cos_lat))
+        nearest = None
+        nearest_km = float('inf')
+        neighbours = []
+        close = set()
+        with self._lock:
+            for r in range(row - 1, row + 2):
+                for c in range(col - col_span, col + col_span + 1):
+                    for plat, plon, addr in self._cells.get((r, c), ()):
+                        d = haversine_km(lat, lon, plat, plon)
+                        if d > self.search_km:
+                            continue
+                        neighbours.append(addr)
+                        if d <= self.radius_km:
+                            close.add((plat, plon))
+                        if d < nearest_km:
+                            nearest, nearest_km = addr, d
+        if nearest is None or len(close) < self.min_neighbours:
+            return None
+        signature = (nearest.get('country'), nearest.get('state'), nearest.get('county'))
+        if any((a.get('country'), a.get('state'), a.get('county')) != signature for a in neighbours):
+            return None
+        return {'address': dict(nearest), 'proximity_km': round(nearest_km, 3)}
@@ -0,0 +1,229 @@
+"""
+Table HTML Parsing Backends
+Turns saved properties-table / company-profile HTML into plain rows for the
+scrapers. Two interchangeable backends produce the same rows: "bs4" (BeautifulSoup,
+the reference) and "lxml" (lxml.html with XPath, several times faster on large
+company tables). Select with SCRAPER_HTML_PARSER=auto|lxml|bs4; auto prefers lxml.
+Company pages with unclosed table cells go to the bs4 (html.parser) reference even
+on the lxml backend, since the two parsers repair such markup differently.
+scripts/benchmark_parsers.py compares them over saved table snapshots.
+"""
+
+import os
+import re
+from typing import Optional, Dict, Any, List
+
+BACKENDS = ("bs4", "lxml")
+
+# Same class test as BeautifulSoup's class_ match: one of the space-separated classes
+_PROPERTIES_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' properties-wrapper-table ')"
+
+_TABLE_TAG_RE = re.compile(r"<(/?)(table|tr|td|th)\b", re.IGNORECASE)
+
+_lxml_available: Optional[bool] = None
+
+
+def _have_lxml() -> bool:
+    global _lxml_available
+    if _lxml_available is None:
+        try:
+            import lxml.html  # noqa: F401
+            _lxml_available = True
+        except Exception:
+            _lxml_available = False
+    return _lxml_available
+
+
+def parser_backend(name: Optional[str] = None) -> str:
+    """Resolve a backend name (argument, else SCRAPER_HTML_PARSER); lxml falls back to bs4 if missing."""
+    name = (name or os.getenv('SCRAPER_HTML_PARSER', 'auto')).lower()
+    if name not in BACKENDS:
+        name = "lxml"
+    if name == "lxml" and not _have_lxml():
+        return "bs4"
+    return name
+
+
+# -- bs4 (reference) ---------------------------------------------------
+
+def _table_rows_bs4(table_html: str) -> List[List[Dict[str, Any]]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(table_html, "lxml")
+    rows: List[List[Dict[str, Any]]] = []
+    for tr in soup.find_all("tr"):
+        cells = []
+        for c in tr.find_all(["td", "th"]):
+            cells.append({
+                "text": c.get_text(strip=True),
+                "links": [
+                    {"text": a.get_text(strip=True), "href": a.get("href", ""), "onclick": a.get("onclick", "")}
+                    for a in c.find_all("a")
+                ],
+            })
+        rows.append(cells)
+    return rows
+
+
+def _company_projects_bs4(company_html: str) -> Dict[str, Any]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(company_html, "html.parser")
+
+    # Find the right table
+    table = soup.find("div", {"class": "properties-wrapper-table"})
+
+    for t in soup.find_all("table", {"class": "properties-wrapper-table"}):
+        header_row = t.find("tr")
+        if not header_row:
+            continue
+        headers = [c.get_text(strip=True).lower() for c in header_row.find_all(["td", "th"])]
+        header_str = ",".join(headers)
+        if "project" in header_str and "commodit" in header_str and "stage" in header_str:
+            table = t
+            break
+    if not table:
+        return {"rows": [], "table_html": None}
+
+    rows = []
+    for tr in table.find_all("tr")[1:]:  # skip header
+        tds = tr.find_all("td")
+        if len(tds) < 4:
+            continue
+
+        project_cell, _, commodities_cell, stage_cell, *rest = tds
+        link_cell = rest[0] if rest else None
+
+        href = None
+        if link_cell:
+            a = link_cell.find("a", href=True)
+            if a:
+                href = a["href"]
+
+        rows.append(_company_row(
+            project_cell.get_text(" ", strip=True),
+            commodities_cell.get_text(strip=True),
+            stage_cell.get_text(strip=True),
+            href,
+        ))
+    return {"rows": rows, "table_html": str(table)}
+
+
+# -- lxml --------------------------------------------------------------
+
+def _text(el, sep: str = "") -> str:
+    """get_text(sep, strip=True) equivalent: stripped text nodes, empty ones dropped."""
+    return sep.join(t for t in (s.strip() for s in el.xpath(".//text()[not(parent::script or parent::style)]")) if t)
+
+
+def _document(html: str):
+    import lxml.html
+    from lxml.etree import ParserError
+
+    try:
+        return lxml.html.document_fromstring(html)
+    except (ParserError, ValueError):
+        return None
+
+
+def _table_rows_lxml(table_html: str) -> List[List[Dict[str, Any]]]:
+    doc = _document(table_html)
+    if doc is None:
+        return []
+    rows: List[List[Dict[str, Any]]] = []
+    for tr in doc.iter("tr"):
+        cells = []
+        for c in tr.xpath(".//td | .//th"):
+            cells.append({
+                "text": _text(c),
+                "links": [
+                    {"text": _text(a), "href": a.get("href", ""), "onclick": a.get("onclick", "")}
+                    for a in c.iter("a")
+                ],
+            })
+        rows.append(cells)
+    return rows
+
+
+def _balanced_table_tags(html: str) -> bool:
+    """Every table/tr/td/th opened is also closed (always true for browser-serialized pages)."""
+    counts: Dict[str, int] = {}
+    for closing, tag in _TABLE_TAG_RE.findall(html):
+        tag = tag.lower()
+        counts[tag] = counts.get(tag, 0) + (-1 if closing else 1)
+    return not any(counts.values())
+
+
+def _company_projects_lxml(company_html: str) -> Dict[str, Any]:
+    import lxml.html
+
+    # libxml2 repairs unclosed cells differently from html.parser; keep the reference rows for those
+    if not _balanced_table_tags(company_html):
+        return _company_projects_bs4(company_html)
+
+    doc = _document(company_html)
+    if doc is None:
+        return {"rows": [], "table_html": None}
+
+    found = doc.xpath(f"//div[{_PROPERTIES_CLASS}]")
+    table = found[0] if found else None
+    for t in doc.xpath(f"//table[{_PROPERTIES_CLASS}]"):
+        header_row = next(t.iter("tr"), None)
+        if header_row is None:
+            continue
+        header_str = ",".join(_text(c).lower() for c in header_row.xpath(".//td | .//th"))
+        if "project" in header_str and "commodit" in header_str and "stage" in header_str:
+            table = t
+            break
+    if table is None:
+        return {"rows": [], "table_html": None}
+
+    rows = []
+    for tr in list(table.iter("tr"))[1:]:  # skip header
+        tds = tr.xpath(".//td")
+        if len(tds) < 4:
+            continue
+
+        project_cell, _, commodities_cell, stage_cell, *rest = tds
+        link_cell = rest[0] if rest else None
+
+        href = None
+        if link_cell is not None:
+            anchors = link_cell.xpath(".//a[@href]")
+            if anchors:
+                href = anchors[0].get("href")
+
+        rows.append(_company_row(_text(project_cell, " "), _text(commodities_cell), _text(stage_cell), href))
+    return {"rows": rows, "table_html": lxml.html.tostring(table, encoding="unicode", with_tail=False)}
+
+
+# -- public ------------------------------------------------------------
+
+def _company_row(name: str, commodities: str, stage: str, href: Optional[str]) -> Dict[str, Any]:
+    link_gid = None
+    if href and "project-profile?gid=" in href:
+        link_gid = href.split("project-profile?gid=")[1].split("&")[0]
+    return {
+        "gid": link_gid,
+        "name": name,
+        "commodities": commodities or None,
+        "stage": stage or None,
+        "project_summary_href": href,
+    }
+
+
+def table_rows(table_html: str, backend: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+    """Rows of cells ({text, links}) from table HTML; same shape as PAGE_EXTRACT_JS produces."""
+    if parser_backend(backend) == "lxml":
+        return _table_rows_lxml(table_html)
+    return _table_rows_bs4(table_html)
+
+
+def company_projects(company_html: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Every row of a company profile's projects table (gid, name, commodities, stage,
+    summary link). table_html is the backend's own serialization of the table.
+    """
+    if parser_backend(backend) == "lxml":
+        return _company_projects_lxml(company_html)
+    return _company_projects_bs4(company_html)
@@ -2,12 +2,28 @@
 """
 Map Center Fetch Service (Playwright)
 Fetches lat/lon/zoom from the MiningHub map page for a given project gid.
-Headless by default. Safe to call from assembler as a quick, single-gid op.
+Headless by default. A shared MapCenterService keeps one browser open and serves
+many GIDs over a pool of pages; safe to call from assembler threads.
 """
 
+import os
+import re
+import json
+import time
+import atexit
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from urllib.parse import urlsplit, parse_qs
+
+from services.page_cache import get_page_cache, MAP_CENTER
+from services.browser_server import launch_browser, release_browser
+from services.browser_pool import BlockingPolicy, make_route_handler
+from services.asset_cache import (
+    AssetCache, TransferMeter, asset_cache_enabled, storage_state_kwargs, save_storage_state,
+)
+from services.dead_letter import DeadLetterQueue, ScrapeDeferred, classify_failure
 
 
 RUNTIME_JS_ASYNC = """
@@ -53,55 +69,179 @@ async () => {
 """
 
 
-async def _fetch_one_async(gid: str, headless: bool, goto_timeout_ms: int, ready_timeout_ms: int) -> Optional[Dict[str, Any]]:
-    from playwright.async_api import async_playwright, TimeoutError as PWTimeout
+MAP_READY_JS = """() => {
+    const w = window;
+    if (w.map && typeof w.map.getCenter==='function') return true;
+    for (const v of Object.values(w)){
+        if (v && typeof v.getCenter==='function') return true;
+    }
+    return false;
+}"""
+
+
+_SCRIPT_RE = re.compile(r'<script[^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+_JSON_START_RE = re.compile(r'[\[{]')
+
+
+def _coords_of(d: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Return (lat, lon) from the coordinate shapes MiningHub payloads use."""
+    for geo_key in ("centroid", "geometry", "center"):
+        geo = d.get(geo_key)
+        if isinstance(geo, dict) and isinstance(geo.get("coordinates"), list) and len(geo["coordinates"]) >= 2:
+            lon, lat = geo["coordinates"][0], geo["coordinates"][1]
+            if isinstance(lon, (int, float)) and isinstance(lat, (int, float)):
+                return float(lat), float(lon)
+    for lat_key, lon_key in (("lat", "lng"), ("lat", "lon"), ("latitude", "longitude")):
+        lat, lon = d.get(lat_key), d.get(lon_key)
+        try:
+            if lat is not None and lon is not None:
+                return float(lat), float(lon)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def url_gid_matches(url: str, gid: str) -> bool:
+    """True when the URL's query carries exactly this gid (gid=12 does not match gid=123)."""
+    return str(gid) in parse_qs(urlsplit(url).query).get("gid", [])
+
+
+def find_center_in_payload(obj: Any, gid: str, url_has_gid: bool = False, _depth: int = 0) -> Optional[Tuple[float, float]]:
+    """
+    Search a JSON payload for the project's coordinates. A record must carry the
+    matching gid (directly or in GeoJSON properties) unless the response URL
+    itself was scoped to the gid.
+    """
+    if _depth > 8:
+        return None
+    if isinstance(obj, dict):
+        props = obj.get("properties") if isinstance(obj.get("properties"), dict) else {}
+        rec_gid = obj.get("gid", props.get("gid"))
+        if (rec_gid is not None and str(rec_gid) == str(gid)) or (url_has_gid and _depth == 0):
+            coords = _coords_of(obj) or _coords_of(props)
+            if coords:
+                return coords
+        values = obj.values()
+    elif isinstance(obj, list):
+        values = obj
+    else:
+        return None
+    for v in values:
+        if isinstance(v, (dict, list)):
+            found = find_center_in_payload(v, gid, url_has_gid=False, _depth=_depth + 1)
+            if found:
+                return found
+    return None
+
+
+def find_center_in_html(html: str, gid: str) -> Optional[Tuple[float, float]]:
+    """
+    Parse inline bootstrap data: every JSON value embedded in a <script> is searched
+    with find_center_in_payload, so only a record carrying this gid can answer.
+    """
+    if not html:
+        return None
+    decoder = json.JSONDecoder()
+    for script in _SCRIPT_RE.findall(html):
+        if "gid" not in script:
+            continue
+        pos = 0
+        while True:
+            m = _JSON_START_RE.search(script, pos)
+            if not m:
+                break
+            try:
+                obj, end = decoder.raw_decode(script, m.start())
+            except ValueError:
+                # Not JSON here (e.g. a JS object literal); try the next bracket
+                pos = m.start() + 1
+                continue
+            coords = find_center_in_payload(obj, gid)
+            if coords and -90 <= coords[0] <= 90 and -180 <= coords[1] <= 180:
+                return coords
+            pos = end
+    return None
+
+
+async def _extract_center(page, gid: str, goto_timeout_ms: int, ready_timeout_ms: int,
+                          mode: str = "network", record: Optional[Callable[[str, float], None]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Navigate an existing page to the map view for gid and read the map center.
+
+    mode="network" captures XHR/fetch JSON responses (and inline bootstrap data)
+    and returns as soon as the project's coordinates arrive; the rendered map
+    (Leaflet/MapboxGL getCenter) is only read if that does not happen first.
+    mode="render" always uses the rendered map. record(path, ms) receives the
+    latency of the path that produced the result.
+    """
+    from playwright.async_api import TimeoutError as PWTimeout
     logger = logging.getLogger(__name__)
 
+    started = time.perf_counter()
+    found: asyncio.Future = asyncio.get_running_loop().create_future()
+    tasks: List[asyncio.Task] = []
+
+    def _resolve(coords: Optional[Tuple[float, float]]) -> None:
+        if coords and not found.done():
+            found.set_result(coords)
+
+    async def _inspect(response) -> None:
+        if found.done():
+            return
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            payload = await response.json()
+        except Exception:
+            return
+        _resolve(find_center_in_payload(payload, gid, url_has_gid=url_gid_matches(response.url, gid)))
+
+    def _on_response(response) -> None:
+        tasks.append(asyncio.ensure_future(_inspect(response)))
+
+    network = mode == "network"
+    if network:
+        page.on("response", _on_response)
+
+    def _result(lat: float, lng: float, zoom, lib: str, path: str) -> Dict[str, Any]:
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if record:
+            record(path, elapsed_ms)
+        logger.info(f"Map center for gid={gid}: lat={lat}, lng={lng} via {lib} ({path}, {elapsed_ms:.0f}ms)")
+        return {"latitude": float(lat), "longitude": float(lng), "map_zoom": zoom, "map_lib": lib}
+
     base_url = f"https://mininghub.com/map?gid={gid}"
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=headless, args=["--no-sandbox", "--disable-gpu"])  # type: ignore
-        context = await browser.new_context(viewport={"width": 1280, "height": 900})
-        page = await context.new_page()
-
-        async def route_blocker(route):
-            rt = route.request.resource_type
-            u = route.request.url
-            if rt in {"image", "media", "font"}:
-                return await route.abort()
-            if any(s in u for s in ["/tile/", "/tiles/", "/{z}/", "/wmts", "/arcgis/", "/basemaps/", "/mapbox/"]):
-                return await route.abort()
-            return await route.continue_()
-
-        await page.route("**/*", route_blocker)
-
-        # Small retry loop for navigation (mirrors legacy script behavior)
-        last_err = None
-        for attempt in range(2):
+    ready: Optional[asyncio.Future] = None
+    try:
+        # Single attempt; batch callers retry failures later from a dead-letter queue
+        try:
+            await page.goto(base_url, wait_until="domcontentloaded", timeout=goto_timeout_ms)
+        except PWTimeout:
+            if not found.done():
+                logger.debug(f"map_center.goto timeout for gid={gid} after {goto_timeout_ms}ms")
+                # Raise rather than return None so callers don't cache it as "no map"
+                raise
+
+        if network and not found.done():
             try:
-                await page.goto(base_url, wait_until="domcontentloaded", timeout=goto_timeout_ms)
-                break
-            except PWTimeout as e:
-                last_err = e
-                if attempt == 1:
-                    logger.debug(f"map_center.goto timeout for gid={gid} after {goto_timeout_ms}ms")
-                    await context.close(); await browser.close()
-                    return None
+                _resolve(find_center_in_html(await page.content(), gid))
+            except Exception:
+                pass
 
+        ready = asyncio.ensure_future(page.wait_for_function(MAP_READY_JS, timeout=ready_timeout_ms))
+        waiters = {ready, found} if network else {ready}
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        if network and found.done():
+            lat, lng = found.result()
+            return _result(lat, lng, None, "network", "network")
         try:
-            await page.wait_for_function(
-                """() => {
-                    const w = window;
-                    if (w.map && typeof w.map.getCenter==='function') return true;
-                    for (const v of Object.values(w)){
-                        if (v && typeof v.getCenter==='function') return true;
-                    }
-                    return false;
-                }""",
-                timeout=ready_timeout_ms
-            )
+            await ready
         except PWTimeout:
             # Proceed to evaluate anyway; some maps are ready but predicate fails
             logger.debug(f"map_center.wait_for_function timeout for gid={gid} after {ready_timeout_ms}ms")
+        except Exception:
             pass
 
         try:
@@ -109,12 +249,270 @@ async def _fetch_one_async(gid: str, headless: bool, goto_timeout_ms: int, ready
         except Exception:
             center = None
 
-        await context.close(); await browser.close()
         if center and center.get("lat") is not None and center.get("lng") is not None:
-            logger.info(f"Map center for gid={gid}: lat={center['lat']}, lng={center['lng']} via {center.get('lib')}")
-            return {"latitude": float(center["lat"]), "longitude": float(center["lng"]), "map_zoom": center.get("zoom"), "map_lib": center.get("lib")}
+            return _result(center["lat"], center["lng"], center.get("zoom"), center.get("lib"), "render")
         logger.warning(f"No map center found for gid={gid}")
         return None
+    finally:
+        # Also on the overall timeout or an error: never leave the readiness poll running
+        if ready is not None:
+            if not ready.done():
+                ready.cancel()
+            elif not ready.cancelled():
+                ready.exception()  # a predicate timeout after the network won is expected
+        if network:
+            try:
+                page.remove_listener("response", _on_response)
+            except Exception:
+                pass
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+
+class MapCenterService:
+    """
+    Long-lived map-center fetcher: one browser, one context and a pool of pages,
+    driven by a private event loop on a background thread. Sync callers (e.g.
+    assembly worker threads) submit coroutines to that loop, so every lookup
+    costs a page navigation instead of a browser launch.
+    """
+
+    def __init__(self, headless: bool = True, pool_size: int = 4,
+                 goto_timeout_ms: int = 7000, ready_timeout_ms: int = 7000, mode: str = "network"):
+        self.headless = headless
+        self.mode = mode
+        self.pool_size = max(1, pool_size)
+        self.goto_timeout_ms = goto_timeout_ms
+        self.ready_timeout_ms = ready_timeout_ms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._pw = None
+        self._browser = None
+        self._browser_shared = False
+        self._context = None
+        self._pages: Optional[asyncio.Queue] = None
+        self._page_count = 0
+        # Created on the service loop by _start; serialises the lazy browser launch
+        self._start_guard: Optional[asyncio.Lock] = None
+        self._stats: Dict[str, float] = {}
+        self._stats_lock = threading.Lock()
+        self.blocking = BlockingPolicy("map")
+        self.asset_cache: Optional[AssetCache] = AssetCache() if asset_cache_enabled() else None
+        self.transfer = TransferMeter(self.asset_cache)
+
+    def _record(self, path: str, elapsed_ms: float) -> None:
+        with self._stats_lock:
+            self._stats[f"{path}_hits"] = self._stats.get(f"{path}_hits", 0) + 1
+            self._stats[f"{path}_ms_total"] = self._stats.get(f"{path}_ms_total", 0.0) + elapsed_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit counts and mean latency per extraction path (network vs render)."""
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        for path in ("network", "render"):
+            hits = stats.get(f"{path}_hits", 0)
+            stats[f"{path}_ms_avg"] = round(stats.get(f"{path}_ms_total", 0.0) / hits, 1) if hits else None
+        stats.update(self.transfer.get_stats(pages=int(sum(stats.get(f"{p}_hits", 0) for p in ("network", "render")))))
+        stats["request_blocking"] = self.blocking.get_stats()
+        return stats
+
+    # -- lifecycle -------------------------------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="map-center-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _start(self) -> None:
+        if self._context is not None and self._page_count >= self.pool_size:
+            return
+        if self._start_guard is None:
+            self._start_guard = asyncio.Lock()
+        async with self._start_guard:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+                self._pw = await async_playwright().start()
+                # Own Chromium, or an isolated context on the shared browser server
+                self._browser, self._browser_shared = await launch_browser(self._pw, headless=self.headless)
+                context = await self._browser.new_context(viewport={"width": 1280, "height": 900}, **storage_state_kwargs())
+                self.transfer.attach(context)
+                # Routing is registered once for the whole context, not per page
+                await context.route("**/*", make_route_handler(self.blocking, self.asset_cache))
+                self._pages = asyncio.Queue()
+                self._page_count = 0
+                self._context = context
+            # Fill the pool, topping up pages lost when a replacement could not be opened
+            while self._page_count < self.pool_size:
+                try:
+                    page = await self._context.new_page()
+                except Exception as e:
+                    if self._page_count == 0:
+                        raise
+                    logging.getLogger(__name__).debug(f"Map center page pool short by {self.pool_size - self._page_count}: {e}")
+                    break
+                self._page_count += 1
+                self._pages.put_nowait(page)
+
+    async def _stop(self) -> None:
+        await save_storage_state(self._context)
+        try:
+            if self._context is not None:
+                await self._context.close()
+        except Exception:
+            pass
+        await release_browser(self._browser, self._browser_shared)
+        try:
+            if self._pw is not None:
+                await self._pw.stop()
+        except Exception:
+            pass
+        self._context = self._browser = self._pw = None
+        self._pages = None
+        self._page_count = 0
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(timeout=15)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._loop = self._thread = None
+        self._start_guard = None
+
+    # -- async API (runs on the service loop) ----------------------------
+    async def _fetch_one(self, gid: str, timeout_ms: int, goto_timeout_ms: Optional[int] = None,
+                         ready_timeout_ms: Optional[int] = None, defer_errors: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one map center over the page pool. Failures return None (never cached);
+        with defer_errors they raise ScrapeDeferred carrying the classified reason.
+        """
+        cache = get_page_cache()
+        if cache:
+            hit, cached = cache.get(MAP_CENTER, gid)
+            if hit:
+                return cached
+        await self._start()
+        page = await self._pages.get()
+        try:
+            center = await asyncio.wait_for(
+                _extract_center(page, gid, goto_timeout_ms or self.goto_timeout_ms, ready_timeout_ms or self.ready_timeout_ms,
+                                mode=self.mode, record=self._record),
+                timeout=max(0.1, timeout_ms / 1000.0)
+            )
+            if cache:
+                # None here means the page loaded but had no map center: cache negatively
+                cache.put(MAP_CENTER, gid, center)
+            return center
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                logging.getLogger(__name__).warning(f"Map center overall timeout for gid={gid} after {timeout_ms}ms")
+            else:
+                logging.getLogger(__name__).debug(f"Map center fetch error for gid={gid}: {e}")
+            # The page may be wedged mid-navigation; replace it
+            try:
+                await page.close()
+            except Exception:
+                pass
+            try:
+                page = await self._context.new_page()
+            except Exception:
+                # Never hand a closed page back to the pool; _start tops the pool up later
+                page = None
+                self._page_count -= 1
+            if defer_errors:
+                raise ScrapeDeferred(classify_failure(e), str(e)) from e
+            return None
+        finally:
+            if page is not None:
+                self._pages.put_nowait(page)
+
+    async def fetch_map_centers_async(self, gids: List[str], timeout_ms: int = 7000) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch many GIDs concurrently over the page pool; each GID has its own timeout.
+        Failed GIDs are deferred and retried once at the end with doubled timeouts on
+        half the pool, so slow pages don't hold slots during the main pass.
+        """
+        await self._start()
+        unique = list(dict.fromkeys(str(g) for g in gids))
+        dead = DeadLetterQueue()
+
+        async def first_pass(gid: str) -> Optional[Dict[str, Any]]:
+            try:
+                return await self._fetch_one(gid, timeout_ms, defer_errors=True)
+            except ScrapeDeferred as e:
+                dead.add(gid, e.reason, e)
+                return None
+
+        results = dict(zip(unique, await asyncio.gather(*(first_pass(g) for g in unique))))
+        letters = dead.drain()
+        if letters:
+            slots = asyncio.Semaphore(max(1, self.pool_size // 2))
+
+            async def retry(gid: str) -> Optional[Dict[str, Any]]:
+                async with slots:
+                    return await self._fetch_one(gid, timeout_ms * 2, goto_timeout_ms=self.goto_timeout_ms * 2,
+                                                 ready_timeout_ms=self.ready_timeout_ms * 2)
+
+            retried = await asyncio.gather(*(retry(d.gid) for d in letters))
+            results.update(zip((d.gid for d in letters), retried))
+            with self._stats_lock:
+                for reason, count in dead.reason_counts().items():
+                    self._stats[f"deferred_{reason}"] = self._stats.get(f"deferred_{reason}", 0) + count
+                self._stats["retry_recovered"] = self._stats.get("retry_recovered", 0) + sum(1 for r in retried if r)
+        return results
+
+    # -- thread-safe sync API --------------------------------------------
+    def fetch_map_centers(self, gids: List[str], timeout_ms: int = 7000) -> Dict[str, Optional[Dict[str, Any]]]:
+        loop = self._ensure_loop()
+        fut = asyncio.run_coroutine_threadsafe(self.fetch_map_centers_async(gids, timeout_ms), loop)
+        return fut.result()
+
+    def fetch(self, gid: str, timeout_ms: int = 7000, goto_timeout_ms: Optional[int] = None,
+              ready_timeout_ms: Optional[int] = None, defer_errors: bool = False) -> Optional[Dict[str, Any]]:
+        loop = self._ensure_loop()
+        fut = asyncio.run_coroutine_threadsafe(
+            self._fetch_one(str(gid), timeout_ms, goto_timeout_ms, ready_timeout_ms, defer_errors=defer_errors), loop)
+        return fut.result()
+
+
+_service: Optional[MapCenterService] = None
+_service_lock = threading.Lock()
+
+
+def get_map_center_service(headless: bool = True) -> MapCenterService:
+    """Process-wide shared MapCenterService (created on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            pool_size = int(os.getenv('MAP_CENTER_POOL_SIZE', '4'))
+            mode = os.getenv('MAP_CENTER_MODE', 'network').lower()
+            _service = MapCenterService(headless=headless, pool_size=pool_size, mode=mode)
+            atexit.register(close_map_center_service)
+        return _service
+
+
+def close_map_center_service() -> None:
+    """Shut down the shared service's browser and event loop, if running."""
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        logging.getLogger(__name__).info("Map center stats", extra=service.get_stats())
+        service.close()
+
+
+def fetch_map_centers(gids: List[str], headless: bool = True, timeout_ms: int = 7000) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Batch helper: fetch map centers for many gids through the shared service."""
+    return get_map_center_service(headless=headless).fetch_map_centers(gids, timeout_ms=timeout_ms)
 
 
 def fetch_map_center(
@@ -123,30 +521,13 @@ def fetch_map_center(
     goto_timeout_ms: int = 7000,
     ready_timeout_ms: int = 7000,
     overall_timeout_ms: int = 7000,
+    defer_errors: bool = False,
 ) -> Optional[Dict[str, Any]]:
-    """Synchronous helper to fetch a single map center for a gid."""
-    import asyncio as _asyncio
-    import logging as _logging
-    logger = _logging.getLogger(__name__)
-
-    async def _runner():
-        return await _asyncio.wait_for(
-            _fetch_one_async(str(gid), headless=headless, goto_timeout_ms=goto_timeout_ms, ready_timeout_ms=ready_timeout_ms),
-            timeout=max(0.1, overall_timeout_ms / 1000.0)
-        )
-
-    try:
-        return _asyncio.run(_runner())
-    except _asyncio.TimeoutError:
-        logger.warning(f"Map center overall timeout for gid={gid} after {overall_timeout_ms}ms")
-        return None
-    except RuntimeError:
-        # If already in an event loop, create a new one
-        try:
-            loop = _asyncio.get_event_loop()
-            return loop.run_until_complete(_runner())
-        except _asyncio.TimeoutError:
-            logger.warning(f"Map center overall timeout (loop) for gid={gid} after {overall_timeout_ms}ms")
-            return None
-
-
+    """
+    Synchronous helper to fetch a single map center for a gid (shared browser).
+    With defer_errors a failed fetch raises ScrapeDeferred (classified reason) instead
+    of returning None, so the caller can retry it later with longer timeouts.
+    """
+    service = get_map_center_service(headless=headless)
+    return service.fetch(str(gid), timeout_ms=overall_timeout_ms, goto_timeout_ms=goto_timeout_ms,
+                         ready_timeout_ms=ready_timeout_ms, defer_errors=defer_errors)
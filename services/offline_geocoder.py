@@ -0,0 +1,127 @@
+"""
+Offline Reverse Geocoder
+Resolves coordinates to country/state/ISO3166-2/county from local admin-boundary
+polygons (e.g. Natural Earth admin-1, geoBoundaries ADM1/ADM2 GeoJSON) using a
+shapely STRtree and vectorized point-in-polygon queries.
+Requires shapely>=2.0 (optional); without it the provider stays disabled.
+"""
+
+import os
+import json
+import logging
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Property names tried in order for each output field across common datasets
+COUNTRY_KEYS = ('admin', 'country', 'NAME_0', 'COUNTRY', 'geonunit', 'shapeGroupName')
+COUNTRY_CODE_KEYS = ('iso_a2', 'ISO_A2')
+STATE_KEYS = ('name', 'name_en', 'NAME_1', 'shapeName')
+ISO_KEYS = ('iso_3166_2', 'ISO_1', 'HASC_1', 'shapeISO')
+COUNTY_KEYS = ('name', 'name_en', 'NAME_2', 'shapeName')
+
+
+def _first(props: Dict[str, Any], keys: Sequence[str]) -> Optional[str]:
+    for k in keys:
+        v = props.get(k)
+        if v not in (None, '', '-99', -99):
+            return str(v)
+    return None
+
+
+class _BoundaryLayer:
+    """One admin level: polygons, their properties and an STRtree over them."""
+
+    def __init__(self, path: str):
+        import shapely
+        from shapely.geometry import shape
+        from shapely.strtree import STRtree
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        geoms = []
+        props: List[Dict[str, Any]] = []
+        for feat in data.get('features', []):
+            try:
+                geom = shape(feat.get('geometry'))
+            except Exception:
+                continue
+            if geom.is_empty:
+                continue
+            geoms.append(geom)
+            props.append(feat.get('properties') or {})
+        self._shapely = shapely
+        self.geoms = geoms
+        self.props = props
+        self.areas = [g.area for g in geoms]
+        self.tree = STRtree(geoms)
+
+    def query(self, lats: Sequence[float], lons: Sequence[float]) -> List[Optional[Dict[str, Any]]]:
+        """Return the properties of the smallest polygon containing each point."""
+        points = self._shapely.points(list(lons), list(lats))
+        point_idx, geom_idx = self.tree.query(points, predicate='within')
+        best: List[Optional[int]] = [None] * len(points)
+        for p, g in zip(point_idx.tolist(), geom_idx.tolist()):
+            # Prefer the smallest containing polygon where boundaries overlap
+            if best[p] is None or self.areas[g] < self.areas[best[p]]:
+                best[p] = g
+        return [self.props[g] if g is not None else None for g in best]
+
+
+class OfflineBoundaryGeocoder:
+    """
+    Local reverse geocoder over admin-1 (state) and optional admin-2 (county) polygons.
+    Results use the compact Nominatim-like shape consumed by the enrichment layer.
+    """
+
+    def __init__(self, admin1_path: str, admin2_path: Optional[str] = None):
+        self.admin1: Optional[_BoundaryLayer] = None
+        self.admin2: Optional[_BoundaryLayer] = None
+        try:
+            import shapely  # noqa: F401
+        except Exception:
+            logger.warning("shapely>=2.0 not installed; offline reverse geocoding disabled")
+            return
+        for attr, path in (('admin1', admin1_path), ('admin2', admin2_path)):
+            if not path:
+                continue
+            if not os.path.exists(path):
+                logger.warning(f"Boundary dataset not found: {path}")
+                continue
+            try:
+                setattr(self, attr, _BoundaryLayer(path))
+                logger.info(f"Loaded {len(getattr(self, attr).geoms)} {attr} boundaries from {os.path.basename(path)}")
+            except Exception as e:
+                logger.warning(f"Failed to load boundary dataset {path}: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.admin1 is not None
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        return self.reverse_many([(latitude, longitude)])[0]
+
+    def reverse_many(self, coords: Sequence[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+        """Resolve a batch of (lat, lon) pairs in one vectorized query per admin level."""
+        if not self.enabled or not coords:
+            return [None] * len(coords)
+        lats = [c[0] for c in coords]
+        lons = [c[1] for c in coords]
+        states = self.admin1.query(lats, lons)
+        counties = self.admin2.query(lats, lons) if self.admin2 else [None] * len(coords)
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for s_props, c_props in zip(states, counties):
+            if not s_props:
+                results.append(None)
+                continue
+            address = {
+                'country': _first(s_props, COUNTRY_KEYS),
+                'country_code': (_first(s_props, COUNTRY_CODE_KEYS) or '').lower() or None,
+                'state': _first(s_props, STATE_KEYS),
+                'ISO3166-2-lvl4': _first(s_props, ISO_KEYS),
+                'county': _first(c_props, COUNTY_KEYS) if c_props else None,
+            }
+            address = {k: v for k, v in address.items() if v}
+            results.append({'address': address, 'offline': True} if address.get('country') else None)
+        return results
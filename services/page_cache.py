@@ -0,0 +1,156 @@
+"""
+Page Result Cache
+Persistent per-GID cache for browser work that rarely changes: map centers and
+scraped project-page records. Entries carry a TTL; "nothing found" outcomes
+(no map center, no company link) are cached too, with a shorter negative TTL.
+Raw properties-table HTML is kept zlib-compressed so parsers can be re-run
+offline when they improve.
+Backed by SQLite (stdlib) in outputs/cache; safe to share across threads.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# v2: centers taken from inline HTML before exact-gid JSON matching may be wrong
+MAP_CENTER = "map_center_v2"
+PROJECT_PAGE = "project_page"
+
+
+class PageResultCache:
+    """GID-keyed result cache with TTLs, negative caching and HTML snapshots."""
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 negative_ttl_seconds: Optional[float] = None):
+        self.path = path or os.path.join("outputs", "cache", "page_cache.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv('SCRAPE_CACHE_TTL_DAYS', '30')) * 86400
+        self.negative_ttl_seconds = (
+            negative_ttl_seconds if negative_ttl_seconds is not None
+            else float(os.getenv('SCRAPE_CACHE_NEGATIVE_TTL_HOURS', '24')) * 3600
+        )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                kind TEXT NOT NULL,
+                gid TEXT NOT NULL,
+                value TEXT,
+                negative INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (kind, gid)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS table_snapshots (
+                gid TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                html BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (gid, idx)
+            )"""
+        )
+        self._conn.commit()
+        self._stats: Dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        self._stats[name] = self._stats.get(name, 0) + 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def get(self, kind: str, gid: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Return (hit, value). A hit with value None is a cached negative result.
+        Expired entries count as misses.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, negative, expires_at FROM results WHERE kind=? AND gid=?",
+                (kind, str(gid))
+            ).fetchone()
+            if not row or row[2] < time.time():
+                self._count(f"{kind}_misses")
+                return False, None
+            self._count(f"{kind}_{'negative_' if row[1] else ''}hits")
+        return True, (json.loads(row[0]) if row[0] else None)
+
+    def put(self, kind: str, gid: str, value: Optional[Dict[str, Any]], negative: Optional[bool] = None) -> None:
+        """Store a result; negative defaults to value being None and uses the shorter TTL."""
+        negative = (value is None) if negative is None else negative
+        now = time.time()
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (kind, gid, value, negative, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, str(gid), json.dumps(value, ensure_ascii=False) if value is not None else None, int(negative), now, now + ttl)
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Failed to write page cache entry {kind}/{gid}: {e}")
+
+    def put_table_snapshots(self, gid: str, tables_html: List[str]) -> None:
+        """Replace the compressed properties-table HTML snapshots for a gid."""
+        if not tables_html:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM table_snapshots WHERE gid=?", (str(gid),))
+                self._conn.executemany(
+                    "INSERT INTO table_snapshots (gid, idx, html, fetched_at) VALUES (?, ?, ?, ?)",
+                    [(str(gid), i, zlib.compress(html.encode('utf-8'), 6), now) for i, html in enumerate(tables_html)]
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Failed to write table snapshots for {gid}: {e}")
+
+    def get_table_snapshots(self, gid: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT html FROM table_snapshots WHERE gid=? ORDER BY idx", (str(gid),)
+            ).fetchall()
+        return [zlib.decompress(r[0]).decode('utf-8') for r in rows]
+
+    def iter_snapshot_gids(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT gid FROM table_snapshots").fetchall()
+        for (gid,) in rows:
+            yield gid
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+_cache: Optional[PageResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageResultCache]:
+    """Process-wide shared cache, or None when disabled via SCRAPE_CACHE=false."""
+    global _cache
+    if os.getenv('SCRAPE_CACHE', 'true').lower() != 'true':
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = PageResultCache(os.getenv('SCRAPE_CACHE_PATH') or None)
+            except Exception as e:
+                logger.warning(f"Page cache unavailable: {e}")
+                return None
+        return _cache
@@ -0,0 +1,179 @@
+"""
+Project Page Layout Classifier
+Identifies the project-page variant from an early DOM snapshot (the right-sider
+buttons and containers recorded by the page probe, outputs/reports/probe_project_pages.csv)
+and learns which late sections each variant actually renders, so scrapers can skip
+waiting for a company-name header or properties table a variant never contains.
+Time spent on waits that end empty ("negative waits") is reported.
+"""
+
+import os
+import csv
+import json
+import logging
+import tempfile
+import threading
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+PROBE_CSV = os.path.join("outputs", "reports", "probe_project_pages.csv")
+LAYOUTS_PATH = os.path.join("outputs", "cache", "page_layouts.json")
+# Bumped when saved counts can no longer be trusted (v1 seeded company_name as absent everywhere)
+LAYOUTS_VERSION = 2
+
+# Sections that load late and are waited on; everything else in the snapshot is structure
+COMPANY_NAME = "company_name"
+PROPERTIES_TABLE = "properties_table"
+LATE_SECTIONS = (COMPANY_NAME, PROPERTIES_TABLE)
+
+# Early DOM snapshot: the probe's structural markers (variant key) plus late-section presence
+LAYOUT_SNAPSHOT_JS = """() => {
+  const side = document.querySelector('#right-sider');
+  return {
+    right_sider: !!side,
+    right_sider_links: side ? Array.from(side.querySelectorAll('a[id]')).map(a => a.id).sort() : [],
+    company_name: !!document.querySelector('h3#company-name'),
+    properties_table: !!document.querySelector('.properties-wrapper-table'),
+  };
+}"""
+
+
+def variant_key(snapshot: Dict[str, Any]) -> str:
+    """Variant name from the structure the probe records: right-sider and its link ids."""
+    if not snapshot.get("right_sider"):
+        return "no-right-sider"
+    return "right-sider:" + ("+".join(snapshot.get("right_sider_links") or []) or "-")
+
+
+def snapshot_from_probe(rows: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Rebuild a snapshot for one GID from its probe_project_pages.csv rows."""
+    ids = {r.get("element_id") or "" for r in rows}
+    return {
+        "right_sider": "right-sider" in ids or any(r.get("parent_id") == "right-sider" for r in rows),
+        "right_sider_links": sorted(r["element_id"] for r in rows
+                                    if r.get("section") == "right_sider_link" and r.get("element_id")),
+        # The probe records neither h3#company-name nor tables; both are learned at runtime
+        COMPANY_NAME: None,
+        PROPERTIES_TABLE: None,
+    }
+
+
+class PageLayoutModel:
+    """
+    Per-variant counts of how often each late section was present. A wait is skipped
+    once a variant has been seen min_samples times without the section; every
+    explore_every-th page of the variant still waits, so a section that starts
+    appearing re-enables the wait.
+    """
+
+    def __init__(self, path: str = LAYOUTS_PATH, probe_csv: str = PROBE_CSV,
+                 min_samples: Optional[int] = None, explore_every: int = 20):
+        self.path = path
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv('SCRAPER_LAYOUT_MIN_SAMPLES', '10'))
+        self.explore_every = max(1, explore_every)
+        self._lock = threading.Lock()
+        # variant -> {"pages": n, "checked": {section: n}, "present": {section: n}}
+        self.variants: Dict[str, Dict[str, Any]] = {}
+        self._stats: Dict[str, float] = {}
+        if not self._load():
+            self.seed_from_probe(probe_csv)
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != LAYOUTS_VERSION:
+                return False
+            self.variants = data.get("variants") or {}
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def save(self) -> None:
+        tmp = None
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Unique temp file per call: threads and shard processes may save at the same time
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+            with self._lock, os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": LAYOUTS_VERSION, "variants": self.variants}, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"Could not save page layouts: {e}")
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def seed_from_probe(self, probe_csv: str) -> int:
+        """Count sections per variant from a probe report; returns GIDs seeded."""
+        groups: Dict[str, List[Dict[str, str]]] = {}
+        try:
+            with open(probe_csv, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    groups.setdefault(row.get("gid") or "", []).append(row)
+        except OSError:
+            return 0
+        for rows in groups.values():
+            self.observe(snapshot_from_probe(rows))
+        return len(groups)
+
+    def _entry(self, variant: str) -> Dict[str, Any]:
+        return self.variants.setdefault(variant, {"pages": 0, "checked": {}, "present": {}})
+
+    def observe(self, snapshot: Dict[str, Any]) -> None:
+        """Record the final state of a page (None = section not known for this page)."""
+        with self._lock:
+            entry = self._entry(variant_key(snapshot))
+            entry["pages"] += 1
+            for section in LATE_SECTIONS:
+                if snapshot.get(section) is None:
+                    continue
+                entry["checked"][section] = entry["checked"].get(section, 0) + 1
+                if snapshot.get(section):
+                    entry["present"][section] = entry["present"].get(section, 0) + 1
+
+    def should_wait(self, snapshot: Dict[str, Any], section: str) -> bool:
+        """False when the section is already there, or this variant has never had it."""
+        if snapshot.get(section):
+            return False
+        with self._lock:
+            entry = self.variants.get(variant_key(snapshot))
+            if not entry:
+                return True
+            checked = entry["checked"].get(section, 0)
+            if checked < self.min_samples or entry["present"].get(section, 0) > 0:
+                return True
+            return entry["pages"] % self.explore_every == 0
+
+    def record_wait(self, section: str, elapsed_ms: float, found: bool) -> None:
+        with self._lock:
+            self._stats[f"{section}_waits"] = self._stats.get(f"{section}_waits", 0) + 1
+            if not found:
+                self._stats[f"{section}_negative_waits"] = self._stats.get(f"{section}_negative_waits", 0) + 1
+                self._stats[f"{section}_negative_wait_ms"] = self._stats.get(f"{section}_negative_wait_ms", 0.0) + elapsed_ms
+
+    def record_skip(self, section: str, budget_ms: float) -> None:
+        """Count a skipped wait; budget_ms is the longest it could have taken."""
+        with self._lock:
+            self._stats[f"{section}_skipped"] = self._stats.get(f"{section}_skipped", 0) + 1
+            self._stats[f"{section}_skipped_budget_ms"] = self._stats.get(f"{section}_skipped_budget_ms", 0.0) + budget_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Waits, negative-wait time and an estimate of the time saved by skips, per section."""
+        with self._lock:
+            stats: Dict[str, Any] = {"layout_variants": len(self.variants)}
+            for section in LATE_SECTIONS:
+                negative = self._stats.get(f"{section}_negative_waits", 0)
+                negative_ms = self._stats.get(f"{section}_negative_wait_ms", 0.0)
+                skipped = self._stats.get(f"{section}_skipped", 0)
+                stats[f"layout_{section}_waits"] = self._stats.get(f"{section}_waits", 0)
+                stats[f"layout_{section}_skipped"] = skipped
+                stats[f"layout_{section}_negative_wait_ms"] = round(negative_ms, 1)
+                # A skipped wait costs about an average negative wait (its full budget if none seen yet)
+                saved = skipped * negative_ms / negative if negative else self._stats.get(f"{section}_skipped_budget_ms", 0.0)
+                stats[f"layout_{section}_saved_ms_est"] = round(saved, 1)
+            return stats
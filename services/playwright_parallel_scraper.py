@@ -3,21 +3,151 @@
 Playwright-based parallel scraper (no company page navigation)
 Extracts project page details directly from project-profile, with robust waits
 for dynamically injected tables and horizontally scalable concurrency.
+Pages are first tried over plain HTTP (server HTML + recorded XHR endpoints);
+Chromium is launched only for gids whose required fields are still missing.
 """
 
 import os
+import json
+import time
+import queue
 import asyncio
+import threading
+import multiprocessing as mp
 from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
-from urllib.parse import urljoin
+from typing import Optional, Dict, Any, List, Tuple, Iterable, AsyncIterable, AsyncIterator, Union, Callable
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote_plus
 import re
 import random
 
+import requests
 from bs4 import BeautifulSoup
 
+from services.page_cache import get_page_cache, PROJECT_PAGE
+from services.browser_pool import PagePool, BlockingPolicy, make_route_handler, apply_stealth
+from services.asset_cache import (
+    AssetCache, TransferMeter, asset_cache_enabled, storage_state_kwargs, save_storage_state,
+)
+from services.browser_server import launch_browser, release_browser
+from services.adaptive_concurrency import AIMDController
+from services.dead_letter import DeadLetterQueue, ScrapeDeferred, classify_failure
+from services.browser_watchdog import BrowserWatchdog, RESTART_BROWSER, child_processes
+from services.html_tables import table_rows
+from services.page_layout import PageLayoutModel, LAYOUT_SNAPSHOT_JS, COMPANY_NAME, PROPERTIES_TABLE
+from services.map_center import url_gid_matches
+
 
 BASE_HOST = "https://mininghub.com"
 
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/127.0.0.0 Safari/537.36"
+)
+
+# Fields the HTTP fast path must fill before the browser is skipped
+REQUIRED_FIELDS = ("company_id", "commodities", "stage")
+
+# XHR endpoints feeding the project page, recorded once from a browser run
+ENDPOINTS_PATH = os.path.join("outputs", "cache", "project_endpoints.json")
+GID_PLACEHOLDER = "{gid}"
+
+
+def gid_url_template(url: str, gid: str) -> Optional[str]:
+    """
+    url with the value of its gid=<gid> query parameter replaced by {gid}; everything
+    else (path, other parameters) is kept verbatim. None if no parameter matches exactly.
+    """
+    parts = urlsplit(url)
+    params = parts.query.split("&")
+    matched = False
+    for i, param in enumerate(params):
+        key, _, value = param.partition("=")
+        if unquote_plus(key) == "gid" and unquote_plus(value) == str(gid):
+            params[i] = f"{key}={GID_PLACEHOLDER}"
+            matched = True
+    if not matched:
+        return None
+    return urlunsplit(parts._replace(query="&".join(params)))
+
+# Scroll scrollable containers and the window to the bottom once to trigger lazy rows
+TABLE_SCROLL_JS = """() => {
+  for (const sel of ['.main-profile-container', '#right-sider', 'body']) {
+    const n = document.querySelector(sel);
+    if (n) { try { n.scrollTop = n.scrollHeight; } catch (e) {} }
+  }
+  window.scrollTo(0, document.body ? document.body.scrollHeight : 0);
+}"""
+
+# Readiness detector: resolves once properties tables exist and their table/row
+# counts have not changed for quietMs, or after maxMs at the latest.
+TABLES_STABLE_JS = """({quietMs, maxMs}) => new Promise(resolve => {
+  const start = performance.now();
+  const count = () => {
+    const ts = document.querySelectorAll('.properties-wrapper-table');
+    let rows = 0;
+    ts.forEach(t => { rows += t.querySelectorAll('tr').length; });
+    return {tables: ts.length, rows};
+  };
+  let last = JSON.stringify(count());
+  let quiet = null;
+  let finished = false;
+  const done = (ok) => {
+    if (finished) return;
+    finished = true;
+    obs.disconnect(); clearTimeout(quiet); clearTimeout(cap);
+    resolve(Object.assign({ok, ms: Math.round(performance.now() - start)}, count()));
+  };
+  const arm = () => {
+    clearTimeout(quiet);
+    quiet = setTimeout(() => { if (count().tables > 0) done(true); }, quietMs);
+  };
+  const obs = new MutationObserver(() => {
+    const cur = JSON.stringify(count());
+    if (cur !== last) { last = cur; arm(); }
+  });
+  obs.observe(document.documentElement, {childList: true, subtree: true});
+  const cap = setTimeout(() => done(count().tables > 0), maxMs);
+  if (count().tables > 0) arm();
+})"""
+
+# One-shot extraction of everything scrape_one reads from the page. Cell/link text
+# mirrors BeautifulSoup get_text(strip=True): trimmed text nodes joined without spaces.
+PAGE_EXTRACT_JS = """() => {
+  const text = (n) => {
+    const out = [];
+    const w = document.createTreeWalker(n, NodeFilter.SHOW_TEXT);
+    while (w.nextNode()) { const t = w.currentNode.nodeValue.trim(); if (t) out.push(t); }
+    return out.join('');
+  };
+  const attr = (sel, name) => { const el = document.querySelector(sel); return el ? el.getAttribute(name) : null; };
+  let tables = Array.from(document.querySelectorAll('table.properties-wrapper-table'));
+  if (!tables.length) tables = Array.from(document.querySelectorAll('div.properties-wrapper-table'));
+  const h1 = document.querySelector('h1#project-title, h1#project_title, h1');
+  const h3 = document.querySelector('h3#company-name');
+  const container = document.querySelector('.main-profile-container');
+  return {
+    title: h1 ? (h1.innerText || '').trim() : null,
+    company_name: h3 ? (h3.innerText || '').trim() : null,
+    company_link_found: !!document.querySelector('#company-news-btn'),
+    company_attrs: [
+      ['href', attr('#company-news-btn', 'href')],
+      ['href', attr('#project-news-btn', 'href')],
+      ['src', attr('#project-map', 'src')],
+    ].concat(Array.from(document.querySelectorAll('a[href*="company-profile?gid="]')).map(a => ['href', a.getAttribute('href')])),
+    container_text: container ? container.innerText : null,
+    tables: tables.map(t => ({
+      html: t.outerHTML,
+      rows: Array.from(t.querySelectorAll('tr')).map(tr => Array.from(tr.querySelectorAll('td, th')).map(c => ({
+        text: text(c),
+        links: Array.from(c.querySelectorAll('a')).map(a => ({
+          text: text(a), href: a.getAttribute('href') || '', onclick: a.getAttribute('onclick') || '',
+        })),
+      }))),
+    })),
+  };
+}"""
+
 
 @dataclass
 class ParallelScrapedProjectRecord:
@@ -56,82 +186,211 @@ class ParallelScrapedProjectRecord:
     scrape_source: str = "playwright_parallel_scraper"
 
 
+@dataclass
+class ScrapeFailure:
+    """A GID that raised during scraping, yielded by iter_scrape in place of a record."""
+    gid: str
+    error_type: str
+    error: str
+    reason: str = "unknown"
+
+
 class PlaywrightParallelScraper:
     """
     Parallel Playwright scraper to extract project page details directly
     from project-profile without navigating to the company page.
     """
 
-    def __init__(self, goto_timeout_ms: int = 45000):
+    def __init__(self, goto_timeout_ms: int = 45000, use_cache: bool = True,
+                 http_fast_path: Optional[bool] = None, http_timeout: float = 15.0):
         self.goto_timeout_ms = goto_timeout_ms
+        # Persistent GID-keyed result cache (services.page_cache); None disables it
+        self.cache = get_page_cache() if use_cache else None
+        # Try a plain HTTP fetch of the page (and recorded XHR endpoints) before Chromium
+        self.http_fast_path = (
+            http_fast_path if http_fast_path is not None
+            else os.getenv('SCRAPE_HTTP_FAST_PATH', 'true').lower() == 'true'
+        )
+        self.http_timeout = http_timeout
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self._endpoints: Optional[List[str]] = self._load_endpoints()
+        # Navigations per pooled page before it is closed and replaced
+        self.page_max_uses = int(os.getenv('SCRAPER_PAGE_MAX_USES', '25'))
+        # AIMD concurrency: max_concurrency is the starting limit, SCRAPER_MAX_CONCURRENCY the ceiling
+        self.adaptive_concurrency = os.getenv('SCRAPER_ADAPTIVE_CONCURRENCY', 'true').lower() == 'true'
+        self.max_concurrency_limit = int(os.getenv('SCRAPER_MAX_CONCURRENCY', '16'))
+        self.concurrency: Optional[AIMDController] = None
+        # Main-pass navigation timeout; the full strategy ladder is kept for deferred retries
+        self.main_goto_timeout_ms = int(os.getenv('SCRAPER_GOTO_TIMEOUT_MS', '20000'))
+        self.dead_letters = DeadLetterQueue()
+        self._context = None
+        self._pool: Optional[PagePool] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        # Recycles the context every N pages / restarts Chromium above an RSS threshold
+        self.watchdog = BrowserWatchdog()
+        self._inflight = 0
+        self._recycling: Optional[asyncio.Event] = None
+        # Static JS/CSS served from disk/memory via route.fulfill; bytes per page metered
+        self.asset_cache: Optional[AssetCache] = AssetCache() if asset_cache_enabled() else None
+        self.transfer = TransferMeter(self.asset_cache)
+        self.blocking = BlockingPolicy("project")
+        # Page variant -> late sections it renders; lets scrape_one skip waits that always time out
+        self.layouts = PageLayoutModel()
+        self._stats: Dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        self._stats[name] = self._stats.get(name, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-path counters plus hit rates (cache / HTTP fast path / browser)."""
+        stats: Dict[str, Any] = dict(self._stats)
+        total = sum(stats.get(k, 0) for k in ("cache_hits", "http_hits", "browser_scrapes"))
+        for path in ("cache_hits", "http_hits", "browser_scrapes"):
+            stats[f"{path}_rate"] = round(stats.get(path, 0) / total, 3) if total else 0.0
+        if self.concurrency is not None:
+            stats.update(self.concurrency.get_stats())
+        stats["dead_letter_reasons"] = self.dead_letters.reason_counts()
+        stats.update(self.watchdog.get_stats())
+        stats.update(self.transfer.get_stats(pages=stats.get("browser_scrapes", 0)))
+        stats["request_blocking"] = self.blocking.get_stats()
+        stats.update(self.layouts.get_stats())
+        return stats
 
     async def _launch(self, headless: bool = True):
         from playwright.async_api import async_playwright
+        before = child_processes()
         self._pw = await async_playwright().start()
-        self._browser = await self._pw.chromium.launch(headless=headless, args=["--no-sandbox", "--disable-gpu"])
+        # Own Chromium, or an isolated context on the shared browser server
+        self._browser, self._browser_shared = await launch_browser(self._pw, headless=headless)
+        # RSS checks cover only the driver and Chromium started here
+        self.watchdog.browser_started(before, shared=self._browser_shared)
+        await self._open_context()
+
+    async def _open_context(self):
         self._context = await self._browser.new_context(
             viewport={"width": 1280, "height": 900},
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/127.0.0.0 Safari/537.36"
-            ),
+            user_agent=USER_AGENT,
             locale="en-US",
             timezone_id="UTC",
+            # Cookies/localStorage from the previous context or run
+            **storage_state_kwargs(),
         )
         try:
+            # No Pragma/Cache-Control: no-cache, so Chromium's HTTP cache can serve repeat loads
             await self._context.set_extra_http_headers({
                 "Accept-Language": "en-US,en;q=0.9",
                 "DNT": "1",
                 "Upgrade-Insecure-Requests": "1",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
                 "Referer": "https://mininghub.com/",
             })
         except Exception:
             pass
+        self.transfer.attach(self._context)
+        # Routing is registered once for the whole context, not per page
+        await self._context.route("**/*", make_route_handler(self.blocking, self.asset_cache))
+        self._pool = PagePool(self._context, max_uses=self.page_max_uses, on_new_page=apply_stealth)
 
-    async def _close(self):
+    async def _ensure_browser(self, headless: bool = True) -> None:
+        """Launch Chromium on first use, so runs served entirely over HTTP never start it."""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._context is None:
+                await self._launch(headless=headless)
+
+    async def _close_context(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        await save_storage_state(self._context)
         try:
             await self._context.close()
         except Exception:
             pass
-        try:
-            await self._browser.close()
-        except Exception:
-            pass
+
+    async def _close_browser(self):
+        await self._close_context()
+        await release_browser(self._browser, self._browser_shared)
         try:
             await self._pw.stop()
         except Exception:
             pass
+        self._context = None
 
-    async def _new_page(self):
-        page = await self._context.new_page()
+    async def _close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        self.layouts.save()
+        if self._context is None:
+            return
+        await self._close_browser()
 
-        async def route_blocker(route):
-            rt = route.request.resource_type
-            u = route.request.url
-            if rt in {"image", "media", "font"}:
-                return await route.abort()
-            if any(s in u for s in ["/tile/", "/tiles/", "/{z}/", "/wmts", "/arcgis/", "/basemaps/", "/mapbox/"]):
-                return await route.abort()
-            return await route.continue_()
+    async def _acquire_browser_slot(self, headless: bool) -> None:
+        """Wait out any recycle in progress, then count this scrape as in flight."""
+        while True:
+            if self._recycling is not None:
+                await self._recycling.wait()
+                continue
+            await self._ensure_browser(headless=headless)
+            if self._recycling is None:
+                break
+        self._inflight += 1
 
-        await page.route("**/*", route_blocker)
+    async def _release_browser_slot(self, headless: bool) -> None:
+        self._inflight -= 1
+        action = self.watchdog.page_done()
+        if action and self._recycling is None:
+            await self._recycle(action, headless)
 
-        # Apply stealth if available (best-effort)
+    async def _recycle(self, action: str, headless: bool) -> None:
+        """Drain in-flight pages, then replace the context (or relaunch the browser)."""
+        self._recycling = asyncio.Event()
         try:
-            from playwright_stealth import stealth_async  # type: ignore
-            try:
-                await stealth_async(page)
-            except Exception:
-                pass
-        except Exception:
-            pass
-        return page
+            while self._inflight > 0:
+                await asyncio.sleep(0.05)
+            async with self._launch_lock:
+                if action == RESTART_BROWSER and not self._browser_shared:
+                    await self._close_browser()
+                    await self._launch(headless=headless)
+                else:
+                    await self._close_context()
+                    await self._open_context()
+            self.watchdog.recycled(action)
+        except Exception as e:
+            print(f"⚠️ Browser recycle failed, relaunching on next use: {e}", flush=True)
+            # A half-open browser (context kept, pool gone) would fail every later lease
+            async with self._launch_lock:
+                try:
+                    await self._close_browser()
+                except Exception:
+                    pass
+                self._context = self._pool = None
+        finally:
+            gate, self._recycling = self._recycling, None
+            gate.set()
 
-    async def _safe_goto(self, page, url: str) -> bool:
-        """Navigate with retries/backoff and flexible wait_until strategies."""
+    async def _safe_goto(self, page, url: str, escalate: bool = True) -> bool:
+        """
+        Navigate with retries/backoff and flexible wait_until strategies.
+        escalate=False (main pass) makes a single attempt and raises ScrapeDeferred on
+        failure or a 429/503, leaving the retry ladder to the dead-letter pass.
+        """
+        if not escalate:
+            started = time.perf_counter()
+            try:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=self.main_goto_timeout_ms)
+            except Exception as e:
+                if self.concurrency is not None:
+                    self.concurrency.observe(None, ok=False, timeout=type(e).__name__ == "TimeoutError")
+                raise ScrapeDeferred(classify_failure(e), str(e)) from e
+            status = response.status if response else None
+            if self.concurrency is not None:
+                self.concurrency.observe((time.perf_counter() - started) * 1000, status=status)
+            if status in (429, 503):
+                raise ScrapeDeferred(classify_failure(status=status), f"HTTP {status}")
+            return True
         strategies = ["domcontentloaded", "load", "commit"]
         timeouts = [15000, 25000, self.goto_timeout_ms]
         for wait_until in strategies:
@@ -139,9 +398,15 @@ class PlaywrightParallelScraper:
                 try:
                     jitter = random.uniform(50, 200)
                     await page.wait_for_timeout(jitter)
-                    await page.goto(url, wait_until=wait_until, timeout=to)
+                    started = time.perf_counter()
+                    response = await page.goto(url, wait_until=wait_until, timeout=to)
+                    if self.concurrency is not None:
+                        self.concurrency.observe((time.perf_counter() - started) * 1000,
+                                                 status=response.status if response else None)
                     return True
-                except Exception:
+                except Exception as e:
+                    if self.concurrency is not None:
+                        self.concurrency.observe(None, ok=False, timeout=type(e).__name__ == "TimeoutError")
                     await page.wait_for_timeout(random.uniform(100, 300))
             # small pause before switching strategy
             await page.wait_for_timeout(random.uniform(150, 350))
@@ -177,66 +442,69 @@ class PlaywrightParallelScraper:
         return None
 
     async def _reveal_tables_by_scrolling(self, page) -> None:
-        """Attempt to reveal lazy-loaded table rows by scrolling containers and window."""
+        """Scroll containers and window to the bottom once to trigger lazy-loaded table rows."""
         try:
-            # Try scrolling main container
-            for sel in [".main-profile-container", "#right-sider", "body"]:
-                try:
-                    el = await page.query_selector(sel)
-                    if el:
-                        await el.scroll_into_view_if_needed()
-                        # Incremental scroll within element if scrollable
-                        await page.evaluate(
-                            "(n) => { try { n.scrollTop = 0; } catch(e){} }",
-                            el
-                        )
-                        for _ in range(6):
-                            await page.evaluate(
-                                "(n) => { try { n.scrollBy ? n.scrollBy(0, 800) : (n.scrollTop += 800); } catch(e){} }",
-                                el
-                            )
-                            await page.wait_for_timeout(250)
-                except Exception:
-                    continue
-            # Fallback: scroll window
-            for _ in range(8):
-                await page.evaluate("() => window.scrollBy(0, 800)")
-                await page.wait_for_timeout(200)
+            await page.evaluate(TABLE_SCROLL_JS)
         except Exception:
             pass
 
+    async def _layout_snapshot(self, page) -> Optional[Dict[str, Any]]:
+        """Early DOM snapshot used to classify the page variant (services.page_layout)."""
+        try:
+            return await page.evaluate(LAYOUT_SNAPSHOT_JS)
+        except Exception:
+            return None
+
+    async def _wait_for_tables_stable(self, page, quiet_ms: int = 600, max_total_ms: int = 30000) -> Dict[str, Any]:
+        """Resolve as soon as properties tables exist and their row counts stop changing.
+
+        Uses an in-page MutationObserver instead of a polling/backoff ladder; returns the
+        observer's verdict ({ok, tables, rows, ms}) or ok=False on timeout/navigation.
+        """
+        started = time.perf_counter()
+        try:
+            state = await page.evaluate(TABLES_STABLE_JS, {"quietMs": quiet_ms, "maxMs": max_total_ms})
+            state = state or {"ok": False}
+        except Exception:
+            state = {"ok": False}
+        if max_total_ms > 0:
+            self.layouts.record_wait(PROPERTIES_TABLE, (time.perf_counter() - started) * 1000, bool(state.get("tables")))
+        return state
+
     async def _collect_properties_tables(self, page, max_total_ms: int = 30000) -> List[str]:
-        """Collect all properties tables' outerHTMLs with a similar wait/backoff strategy."""
-        delays = [2000, 3000, 5000, 8000, 12000]
-        elapsed = 0
+        """Wait for the properties tables to settle, then collect their outerHTMLs in one pass."""
+        state = await self._wait_for_tables_stable(page, max_total_ms=max_total_ms)
+        if not state.get("tables"):
+            return []
         tables_html: List[str] = []
         seen: set[str] = set()
-        for d in delays:
-            remaining = max_total_ms - elapsed
-            if remaining <= 0:
-                break
-            try:
-                await page.wait_for_selector(".properties-wrapper-table", timeout=min(d, remaining))
-                elements = await page.query_selector_all("table.properties-wrapper-table")
-                if not elements or len(elements) == 0:
-                    elements = await page.query_selector_all("div.properties-wrapper-table")
-                for el in elements or []:
-                    try:
-                        outer = await el.evaluate("(node) => node.outerHTML")
-                        if outer and outer not in seen:
-                            seen.add(outer)
-                            tables_html.append(outer)
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-            await page.wait_for_timeout(250)
-            elapsed += d
+        try:
+            elements = await page.query_selector_all("table.properties-wrapper-table")
+            if not elements or len(elements) == 0:
+                elements = await page.query_selector_all("div.properties-wrapper-table")
+            for el in elements or []:
+                try:
+                    outer = await el.evaluate("(node) => node.outerHTML")
+                    if outer and outer not in seen:
+                        seen.add(outer)
+                        tables_html.append(outer)
+                except Exception:
+                    continue
+        except Exception:
+            pass
         return tables_html
 
+    @staticmethod
+    def _table_rows_from_html(table_html: str) -> List[List[Dict[str, Any]]]:
+        """Rows of cells ({text, links}) from table HTML; same shape as PAGE_EXTRACT_JS produces."""
+        return table_rows(table_html)
+
     def _parse_properties_table(self, table_html: str, result: ParallelScrapedProjectRecord) -> None:
         """Parse the properties table HTML to fill project fields and companies."""
-        soup = BeautifulSoup(table_html, "lxml")
+        self._apply_table_rows(self._table_rows_from_html(table_html), result)
+
+    def _apply_table_rows(self, rows: List[List[Dict[str, Any]]], result: ParallelScrapedProjectRecord) -> None:
+        """Fill project fields and companies from structured table rows."""
         field_mapping = {
             "project": "project_name",
             "operator": "operator",
@@ -248,13 +516,12 @@ class PlaywrightParallelScraper:
         def _norm(s: str) -> str:
             return " ".join((s or "").strip().lower().split())
 
-        rows = soup.find_all("tr")
         if not rows:
             return
 
         # Detect header-style (projects table) vs key-value (main table)
-        first_cells = rows[0].find_all(["td", "th"]) if rows else []
-        header_labels = [c.get_text(strip=True).lower() for c in first_cells]
+        first_cells = rows[0]
+        header_labels = [c["text"].lower() for c in first_cells]
         is_header_table = (
             len(first_cells) >= 3 and
             any("project" in h for h in header_labels) and
@@ -275,17 +542,18 @@ class PlaywrightParallelScraper:
             # Try to find row by current gid first (robust), else by project name
             target_row = None
             # 1) by gid link
-            gid_anchor = soup.find("a", href=re.compile(rf"project-profile\\?gid={re.escape(str(result.gid))}\\b"))
-            if gid_anchor:
-                target_row = gid_anchor.find_parent("tr")
+            gid_href = re.compile(rf"project-profile\?gid={re.escape(str(result.gid))}\b")
+            for r in rows:
+                if any(gid_href.search(link["href"]) for c in r for link in c["links"]):
+                    target_row = r
+                    break
             # 2) by project name match in project column
             if not target_row and "project_name" in col_index and result.project_name:
                 pcol = col_index["project_name"]
                 for r in rows[1:]:
-                    cells = r.find_all(["td", "th"])
-                    if len(cells) <= pcol:
+                    if len(r) <= pcol:
                         continue
-                    pname = cells[pcol].get_text(strip=True)
+                    pname = r[pcol]["text"]
                     if _norm(pname) == _norm(result.project_name):
                         target_row = r
                         break
@@ -294,36 +562,35 @@ class PlaywrightParallelScraper:
                 target_row = rows[1]
 
             if target_row:
-                cells = target_row.find_all(["td", "th"])
+                cells = target_row
                 # project name from table if missing
                 if "project_name" in col_index and not result.project_name and len(cells) > col_index["project_name"]:
-                    val = cells[col_index["project_name"]].get_text(strip=True)
+                    val = cells[col_index["project_name"]]["text"]
                     if val:
                         result.project_name = val
                 # commodities
                 if "commodities" in col_index and getattr(result, "commodities", None) is None:
                     idx = col_index["commodities"]
                     if len(cells) > idx:
-                        val = cells[idx].get_text(strip=True)
+                        val = cells[idx]["text"]
                         if val and val != "-":
                             result.commodities = val
                 # stage
                 if "stage" in col_index and getattr(result, "stage", None) is None:
                     idx = col_index["stage"]
                     if len(cells) > idx:
-                        val = cells[idx].get_text(strip=True)
+                        val = cells[idx]["text"]
                         if val and val != "-":
                             result.stage = val
 
             # Ownership/company extraction rarely present in header table, skip here
         else:
             # Key-value main table parsing and ownership link extraction
-            for tr in rows:
-                tds = tr.find_all(["td", "th"])
+            for tds in rows:
                 if len(tds) < 2:
                     continue
-                label = tds[0].get_text(strip=True).lower()
-                value = tds[1].get_text(strip=True)
+                label = tds[0]["text"].lower()
+                value = tds[1]["text"]
                 if not value or value == "-":
                     continue
 
@@ -340,12 +607,12 @@ class PlaywrightParallelScraper:
 
                 # Extract companies from ownership cell
                 if "ownership" in label:
-                    for link in tds[1].find_all("a"):
-                        company_name = link.get_text(strip=True)
+                    for link in tds[1]["links"]:
+                        company_name = link["text"]
                         if not company_name:
                             continue
                         company_id = None
-                        for attr_val in [link.get("onclick", ""), link.get("href", "")]:
+                        for attr_val in [link["onclick"], link["href"]]:
                             if "gid=" in attr_val:
                                 m = re.search(r"gid=(\d+)", attr_val)
                                 if m:
@@ -431,135 +698,585 @@ class PlaywrightParallelScraper:
         except Exception:
             pass
 
-    async def scrape_one(self, gid: str, headless: bool = True, verbose: bool = True) -> ParallelScrapedProjectRecord:
-        url = urljoin(BASE_HOST, f"/project-profile?gid={gid}")
-        rec = ParallelScrapedProjectRecord(gid=str(gid), project_url=url)
+    @staticmethod
+    def _load_endpoints() -> Optional[List[str]]:
+        try:
+            if os.path.exists(ENDPOINTS_PATH):
+                with open(ENDPOINTS_PATH, 'r', encoding='utf-8') as f:
+                    saved = list(json.load(f).get("templates", []))
+                # Templates learned before exact gid matching may carry {gid} in the wrong place
+                templates = [t for t in saved if url_gid_matches(t, GID_PLACEHOLDER)]
+                return templates if templates or not saved else None
+        except Exception:
+            pass
+        return None
 
-        page = await self._new_page()
+    def _save_endpoints(self, templates: List[str]) -> None:
+        self._endpoints = sorted(set(templates))
         try:
-            ok = await self._safe_goto(page, url)
-            if not ok and verbose:
-                print(f"[DEBUG {gid}] goto() failed across strategies; continuing to attempt parse.")
+            os.makedirs(os.path.dirname(ENDPOINTS_PATH), exist_ok=True)
+            with open(ENDPOINTS_PATH, 'w', encoding='utf-8') as f:
+                json.dump({"templates": self._endpoints}, f, indent=2)
+        except Exception:
+            pass
+
+    def _record_endpoints(self, page, gid: str) -> Tuple[List[str], Callable[[Any], Any]]:
+        """
+        Record XHR/fetch URLs for this gid whose responses carry table markup, as {gid}
+        templates. Returns (found, listener); detach the listener before reusing the page.
+        """
+        found: List[str] = []
+
+        async def inspect(response):
             try:
-                await page.wait_for_load_state("networkidle", timeout=5000)
+                if response.request.resource_type not in {"xhr", "fetch"} or not url_gid_matches(response.url, gid):
+                    return
+                body = await response.text()
+                template = gid_url_template(response.url, gid)
+                if "<tr" in body and template:
+                    found.append(template)
             except Exception:
                 pass
 
-            # Try to reveal dynamic content by scrolling
+        def listener(response):
+            asyncio.ensure_future(inspect(response))
+
+        page.on("response", listener)
+        return found, listener
+
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                self._session.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept-Language": "en-US,en;q=0.9",
+                    "Referer": "https://mininghub.com/",
+                })
+            return self._session
+
+    def _http_request(self, url: str) -> Tuple[Optional[int], Optional[str]]:
+        try:
+            resp = self._get_session().get(url, timeout=self.http_timeout)
+            return resp.status_code, resp.text
+        except requests.exceptions.RequestException:
+            return None, None
+
+    async def _http_get(self, url: str) -> Optional[str]:
+        status, text = await asyncio.to_thread(self._http_request, url)
+        if status is None:
+            self._count("http_errors")
+            return None
+        if status != 200:
+            self._count(f"http_status_{status}")
+            if self.concurrency is not None and status in (429, 503):
+                self.concurrency.observe(None, ok=False, status=status)
+            return None
+        return text
+
+    @staticmethod
+    def _tables_from_markup(markup: str) -> List[str]:
+        """Properties tables found in an HTML document/fragment or in HTML strings inside a JSON payload."""
+        fragments = [markup]
+        try:
+            payload = json.loads(markup)
+            fragments = []
+            stack = [payload]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, dict):
+                    stack.extend(node.values())
+                elif isinstance(node, list):
+                    stack.extend(node)
+                elif isinstance(node, str) and "<tr" in node:
+                    fragments.append(node)
+        except ValueError:
+            pass
+        tables: List[str] = []
+        for fragment in fragments:
+            soup = BeautifulSoup(fragment, "lxml")
+            for el in soup.select("table.properties-wrapper-table") or soup.select("div.properties-wrapper-table"):
+                html = str(el)
+                if html not in tables:
+                    tables.append(html)
+        return tables
+
+    @staticmethod
+    def _apply_company_attrs(candidates: List[Tuple[str, Optional[str]]], result: ParallelScrapedProjectRecord) -> bool:
+        """Set company id/url from (attr, value) pairs of known link/map attributes; first match wins."""
+        for attr, val in candidates:
+            if not val:
+                continue
+            m = None
+            if attr == "href" and "company-profile" in val:
+                # Only accept company ids from company-profile links, never from project-profile
+                m = re.search(r"[?&]gid=(\d+)", val)
+            elif attr == "src":
+                # Map src can contain both gid (project) and companyId; only use companyId here
+                m = re.search(r"[?&]companyId=(\d+)", val)
+            if m:
+                result.company_id = m.group(1)
+                if not result.company_name and getattr(result, "operator", None):
+                    result.company_name = result.operator
+                result.company_url = f"{BASE_HOST}/company-profile?gid={result.company_id}"
+                return True
+        return False
+
+    def _extract_company_from_soup(self, soup: BeautifulSoup, result: ParallelScrapedProjectRecord) -> None:
+        """Static-HTML counterpart of _extract_fast_company_from_attrs."""
+        candidates: List[Tuple[str, Optional[str]]] = []
+        for sel, attr in [("#company-news-btn", "href"), ("#project-news-btn", "href"), ("#project-map", "src")]:
+            el = soup.select_one(sel)
+            candidates.append((attr, el.get(attr) if el else None))
+        candidates.extend(("href", a.get("href")) for a in soup.select('a[href*="company-profile?gid="]'))
+        self._apply_company_attrs(candidates, result)
+
+    async def _scrape_http(self, gid: str, url: str) -> Optional[Tuple[ParallelScrapedProjectRecord, List[str]]]:
+        """
+        Fast path: fetch the server HTML and any recorded XHR endpoints without a browser.
+        Returns (record, table snapshots) only when every REQUIRED_FIELDS value was found.
+        """
+        html = await self._http_get(url)
+        if not html:
+            return None
+        rec = ParallelScrapedProjectRecord(gid=str(gid), project_url=url)
+        soup = BeautifulSoup(html, "lxml")
+        h1 = soup.select_one("h1#project-title, h1#project_title, h1")
+        if h1 and h1.get_text(strip=True):
+            rec.project_name = h1.get_text(strip=True)
+        rec.company_profile_link_found = soup.select_one("#company-news-btn") is not None
+        h3 = soup.select_one("h3#company-name")
+        if h3 and h3.get_text(strip=True):
+            rec.company_name = h3.get_text(strip=True)
+
+        snapshots = self._tables_from_markup(html)
+        for template in self._endpoints or []:
+            body = await self._http_get(urljoin(BASE_HOST, template.replace(GID_PLACEHOLDER, str(gid))))
+            if body:
+                snapshots.extend(t for t in self._tables_from_markup(body) if t not in snapshots)
+        for table_html in snapshots:
+            self._parse_properties_table(table_html, rec)
+        if not rec.company_id:
+            self._extract_company_from_soup(soup, rec)
+        if any(getattr(rec, f) is None for f in REQUIRED_FIELDS):
+            return None
+        self._finalize_record(rec)
+        rec.scrape_source = "http_fast_path"
+        return rec, snapshots
+
+    def _finalize_record(self, rec: ParallelScrapedProjectRecord) -> None:
+        """Fill company_name from operator and normalise it to Proper Case."""
+        if not rec.company_name and getattr(rec, "operator", None):
+            rec.company_name = rec.operator
+        try:
+            if rec.company_name and isinstance(rec.company_name, str):
+                rec.company_name = self._to_proper_case(rec.company_name)
+            if not rec.operator and rec.company_name:
+                rec.operator = rec.company_name
+        except Exception:
+            pass
+
+    def _record_from_cache(self, gid: str) -> Optional[ParallelScrapedProjectRecord]:
+        if not self.cache:
+            return None
+        hit, cached = self.cache.get(PROJECT_PAGE, str(gid))
+        if not hit or not cached:
+            return None
+        known = set(ParallelScrapedProjectRecord.__dataclass_fields__)
+        return ParallelScrapedProjectRecord(**{k: v for k, v in cached.items() if k in known})
+
+    def _store_in_cache(self, rec: ParallelScrapedProjectRecord, tables_html: List[str]) -> None:
+        if not self.cache:
+            return
+        # No company link is a "negative" outcome: cached with the shorter TTL
+        self.cache.put(PROJECT_PAGE, rec.gid, asdict(rec), negative=not rec.company_id)
+        self.cache.put_table_snapshots(rec.gid, tables_html)
+
+    def reparse_from_snapshots(self, gid: str) -> Optional[ParallelScrapedProjectRecord]:
+        """Rebuild a record offline from cached properties-table HTML (no browser)."""
+        if not self.cache:
+            return None
+        tables_html = self.cache.get_table_snapshots(str(gid))
+        if not tables_html:
+            return None
+        rec = ParallelScrapedProjectRecord(gid=str(gid), project_url=urljoin(BASE_HOST, f"/project-profile?gid={gid}"))
+        for table_html in tables_html:
+            self._parse_properties_table(table_html, rec)
+        if not rec.company_name and rec.operator:
+            rec.company_name = rec.operator
+        return rec
+
+    @staticmethod
+    def _apply_container_text(text: Optional[str], rec: ParallelScrapedProjectRecord) -> None:
+        """Fill fields from "Label:" / value line pairs in the profile container text."""
+        lines = [l.strip() for l in (text or "").split("\n") if l.strip()]
+        mapping = {"project:": "project_name", "operator:": "operator", "commodities:": "commodities", "stage:": "stage"}
+        for i, line in enumerate(lines):
+            for key, attr in mapping.items():
+                if key in line.lower() and i + 1 < len(lines):
+                    val = lines[i + 1]
+                    if attr == "project_name" and not rec.project_name:
+                        rec.project_name = val
+                    elif attr == "operator" and not getattr(rec, "operator", None):
+                        rec.operator = val
+                    elif attr in {"commodities", "stage"} and getattr(rec, attr) is None:
+                        setattr(rec, attr, val)
+                    break
+
+    async def _evaluate_page_data(self, page) -> Optional[Dict[str, Any]]:
+        try:
+            data = await page.evaluate(PAGE_EXTRACT_JS)
+            return data if isinstance(data, dict) else None
+        except Exception:
+            return None
+
+    def _apply_page_tables(self, data: Dict[str, Any], rec: ParallelScrapedProjectRecord, snapshots: List[str]) -> None:
+        seen = set()
+        for table in data.get("tables") or []:
+            html = table.get("html")
+            if not html or html in seen:
+                continue
+            seen.add(html)
+            if html not in snapshots:
+                snapshots.append(html)
+            self._apply_table_rows(table.get("rows") or [], rec)
+
+    async def _extract_with_script(self, page, rec: ParallelScrapedProjectRecord, snapshots: List[str],
+                                   wait_tables: bool = True) -> bool:
+        """
+        Read title, company name/links, container text and parsed table rows with one
+        page.evaluate per pass (PAGE_EXTRACT_JS). Returns False if the script failed,
+        so the caller can fall back to per-element queries. wait_tables=False reads the
+        page as it is, for layouts that never render properties tables.
+        """
+        if wait_tables:
+            await self._wait_for_tables_stable(page, max_total_ms=35000)
+        data = await self._evaluate_page_data(page)
+        if data is None:
+            return False
+        if data.get("title") and not rec.project_name:
+            rec.project_name = data["title"]
+        rec.company_profile_link_found = bool(data.get("company_link_found"))
+        if data.get("company_name"):
+            rec.company_name = rec.company_name or data["company_name"]
+        self._apply_page_tables(data, rec, snapshots)
+
+        # If key fields still missing, try a second reveal/collect/parse pass
+        if (rec.commodities is None or rec.stage is None) and wait_tables:
             await self._reveal_tables_by_scrolling(page)
+            await self._wait_for_tables_stable(page, max_total_ms=3000)
+            data = await self._evaluate_page_data(page) or data
+            self._apply_page_tables(data, rec, snapshots)
+        else:
+            self._apply_container_text(data.get("container_text"), rec)
 
-            # project title, if available
-            try:
-                h1 = await page.query_selector("h1#project-title, h1#project_title, h1")
-                if h1:
-                    txt = await h1.inner_text()
-                    if txt and not rec.project_name:
-                        rec.project_name = txt.strip()
-            except Exception:
-                pass
+        if not rec.company_id:
+            self._apply_company_attrs([tuple(c) for c in data.get("company_attrs") or []], rec)
+        return True
 
-            # presence of company link id
-            try:
-                rec.company_profile_link_found = bool(await page.query_selector("#company-news-btn"))
-            except Exception:
-                rec.company_profile_link_found = False
+    async def _extract_with_queries(self, page, rec: ParallelScrapedProjectRecord, snapshots: List[str],
+                                    wait_tables: bool = True) -> None:
+        """Per-element fallback for when PAGE_EXTRACT_JS cannot run."""
+        # project title, if available
+        try:
+            h1 = await page.query_selector("h1#project-title, h1#project_title, h1")
+            if h1:
+                txt = await h1.inner_text()
+                if txt and not rec.project_name:
+                    rec.project_name = txt.strip()
+        except Exception:
+            pass
+
+        # presence of company link id
+        try:
+            rec.company_profile_link_found = bool(await page.query_selector("#company-news-btn"))
+        except Exception:
+            rec.company_profile_link_found = False
 
-            # try to read company name from h3 explicitly
+        # try to read company name from h3 explicitly
+        try:
+            h3 = await page.query_selector("h3#company-name")
+            if h3:
+                name_txt = (await h3.inner_text()) or ""
+                name_txt = name_txt.strip()
+                if name_txt:
+                    rec.company_name = rec.company_name or name_txt
+        except Exception:
+            pass
+
+        # collect and parse all properties tables
+        tables_html = await self._collect_properties_tables(page, max_total_ms=35000 if wait_tables else 0)
+        snapshots.extend(tables_html)
+
+        if tables_html:
+            for table_html in tables_html:
+                self._parse_properties_table(table_html, rec)
+        # If key fields missing, try another scroll and second pass
+        # If key fields still missing, try a second reveal/collect/parse pass regardless of table count
+        if (rec.commodities is None or rec.stage is None) and wait_tables:
+            await self._reveal_tables_by_scrolling(page)
+            # Short re-check: only catches rows injected after the first settle
+            tables_html2 = await self._collect_properties_tables(page, max_total_ms=3000)
+            snapshots.extend(t for t in tables_html2 if t not in snapshots)
+            for table_html in tables_html2:
+                self._parse_properties_table(table_html, rec)
+        else:
+            # Fallback: parse container text (no debug printing)
             try:
-                h3 = await page.wait_for_selector("h3#company-name", timeout=4000)
-                if h3:
-                    name_txt = (await h3.inner_text()) or ""
-                    name_txt = name_txt.strip()
-                    if name_txt:
-                        rec.company_name = rec.company_name or name_txt
+                container = await page.query_selector(".main-profile-container")
+                if container:
+                    self._apply_container_text(await container.inner_text(), rec)
             except Exception:
                 pass
 
-            # collect and parse all properties tables
-            tables_html = await self._collect_properties_tables(page, max_total_ms=35000)
+        # Fast company extraction from known attributes if still not set
+        if not rec.company_id:
+            await self._extract_fast_company_from_attrs(page, rec)
+
+    async def scrape_one(self, gid: str, headless: bool = True, verbose: bool = True,
+                         escalate: bool = True) -> ParallelScrapedProjectRecord:
+        url = urljoin(BASE_HOST, f"/project-profile?gid={gid}")
+        cached = self._record_from_cache(gid)
+        if cached:
+            self._count("cache_hits")
+            return cached
+        if self.http_fast_path:
+            fast = await self._scrape_http(gid, url)
+            if fast:
+                rec, snapshots = fast
+                self._count("http_hits")
+                self._store_in_cache(rec, snapshots)
+                return rec
+            self._count("http_fallbacks")
+
+        await self._acquire_browser_slot(headless)
+        self._count("browser_scrapes")
+        rec = ParallelScrapedProjectRecord(gid=str(gid), project_url=url)
+        snapshots: List[str] = []
+
+        try:
+            async with self._pool.lease() as lease:
+                page = lease.page
+                # Learn which XHRs carry the tables once, so later gids can skip the browser
+                recorder = self._record_endpoints(page, gid) if self.http_fast_path and self._endpoints is None else None
+                ok = await self._safe_goto(page, url, escalate=escalate)
+                # A page that could not navigate is replaced rather than reused
+                lease.broken = not ok
+                if not ok and verbose:
+                    print(f"[DEBUG {gid}] goto() failed across strategies; continuing to attempt parse.")
 
-            if tables_html:
-                for table_html in tables_html:
-                    self._parse_properties_table(table_html, rec)
-            # If key fields missing, try another scroll and second pass
-            # If key fields still missing, try a second reveal/collect/parse pass regardless of table count
-            if (rec.commodities is None or rec.stage is None):
+                # Try to reveal dynamic content by scrolling (readiness is observed, not slept on)
                 await self._reveal_tables_by_scrolling(page)
-                tables_html2 = await self._collect_properties_tables(page, max_total_ms=15000)
-                for table_html in tables_html2:
-                    self._parse_properties_table(table_html, rec)
-            else:
-                # Fallback: parse container text (no debug printing)
-                try:
-                    container = await page.query_selector(".main-profile-container")
-                    if container:
-                        text = await container.inner_text()
-                        lines = [l.strip() for l in (text or "").split("\n") if l.strip()]
-                        mapping = {"project:": "project_name", "operator:": "operator", "commodities:": "commodities", "stage:": "stage"}
-                        for i, line in enumerate(lines):
-                            for key, attr in mapping.items():
-                                if key in line.lower() and i + 1 < len(lines):
-                                    val = lines[i + 1]
-                                    if attr == "project_name" and not rec.project_name:
-                                        rec.project_name = val
-                                    elif attr == "operator" and not getattr(rec, "operator", None):
-                                        rec.operator = val
-                                    elif attr in {"commodities", "stage"} and getattr(rec, attr) is None:
-                                        setattr(rec, attr, val)
-                                    break
-                except Exception:
-                    pass
 
-            # Ensure company_name set from operator if still missing
-            if not rec.company_name and getattr(rec, "operator", None):
-                rec.company_name = rec.operator
+                # Skip waits for sections this page variant never renders
+                layout = await self._layout_snapshot(page) if ok else None
+                if layout is None or self.layouts.should_wait(layout, COMPANY_NAME):
+                    started = time.perf_counter()
+                    try:
+                        await page.wait_for_selector("h3#company-name", timeout=4000)
+                        found = True
+                    except Exception:
+                        found = False
+                    self.layouts.record_wait(COMPANY_NAME, (time.perf_counter() - started) * 1000, found)
+                else:
+                    self.layouts.record_skip(COMPANY_NAME, 4000)
+                wait_tables = layout is None or self.layouts.should_wait(layout, PROPERTIES_TABLE)
+                if not wait_tables:
+                    self.layouts.record_skip(PROPERTIES_TABLE, 35000)
 
-            # Fast company extraction from known attributes if still not set
-            if not rec.company_id:
-                await self._extract_fast_company_from_attrs(page, rec)
+                if not await self._extract_with_script(page, rec, snapshots, wait_tables=wait_tables):
+                    self._count("extract_script_fallbacks")
+                    await self._extract_with_queries(page, rec, snapshots, wait_tables=wait_tables)
 
-            # Normalize company_name to Proper Case if captured
-            try:
-                if rec.company_name and isinstance(rec.company_name, str):
-                    rec.company_name = self._to_proper_case(rec.company_name)
-                if not rec.operator and rec.company_name:
-                    rec.operator = rec.company_name
-            except Exception:
-                pass
+                if layout is not None:
+                    # Final state of the page teaches the model what this variant contains
+                    final = await self._layout_snapshot(page)
+                    if final is not None:
+                        self.layouts.observe(final)
+
+                # company_name from operator, Proper Case
+                self._finalize_record(rec)
 
-            return rec
+                if recorder is not None:
+                    page.remove_listener("response", recorder[1])
+                # Only cache pages that actually loaded
+                if ok or snapshots:
+                    self._store_in_cache(rec, snapshots)
+                    if recorder is not None and self._endpoints is None:
+                        # An empty list is saved too: the tables were in the page HTML or nowhere
+                        self._save_endpoints(recorder[0])
+                return rec
         finally:
-            try:
-                await page.close()
-            except Exception:
-                pass
+            await self._release_browser_slot(headless)
 
     @staticmethod
     def to_dict(rec: ParallelScrapedProjectRecord) -> Dict[str, Any]:
         return asdict(rec)
 
-    async def scrape_many_parallel(self, gids: List[str], max_concurrency: int = 4, headless: bool = True, verbose: bool = True) -> List[ParallelScrapedProjectRecord]:
-        await self._launch(headless=headless)
-        results: List[ParallelScrapedProjectRecord] = []
-        semaphore = asyncio.Semaphore(max_concurrency)
+    async def iter_scrape(self, gids: Union[Iterable[str], AsyncIterable[str]], max_concurrency: int = 4, headless: bool = True,
+                          verbose: bool = False, buffer_size: Optional[int] = None, retry_failed: bool = True
+                          ) -> AsyncIterator[Union[ParallelScrapedProjectRecord, ScrapeFailure]]:
+        """
+        Yield records (or ScrapeFailure) in completion order while scraping continues.
+        gids may be an async iterable. A GID is only taken from it once a concurrency
+        slot is free, so at most the current limit's worth is claimed at a time. Workers
+        block once buffer_size results are waiting, so a slow consumer throttles
+        scraping instead of buffering the whole run. Closing the generator early (e.g.
+        breaking out of an `async with contextlib.aclosing(...)` loop) cancels outstanding
+        work and closes the browser.
+
+        Main-pass failures are parked in self.dead_letters with a classified reason and
+        retried after the main pass, with the full goto ladder and half the concurrency;
+        only GIDs that fail again are yielded as ScrapeFailure.
+        """
+        out: asyncio.Queue = asyncio.Queue(maxsize=buffer_size or max_concurrency)
+        done = object()
+        self.dead_letters = DeadLetterQueue()
+        n_workers = max(1, max_concurrency)
+        if self.adaptive_concurrency:
+            # Start at max_concurrency; the controller's limit gates how many workers scrape at once
+            self.concurrency = AIMDController(initial=n_workers, max_limit=max(n_workers, self.max_concurrency_limit))
+            n_workers = self.concurrency.max_limit
 
-        async def bound_scrape(gid: str):
-            async with semaphore:
+        async def scrape(gid: str, escalate: bool):
+            if verbose:
+                print(f"🧭 {'Retrying' if escalate else 'Fetching'} GID {gid}…", flush=True)
+            return await self.scrape_one(gid, headless=headless, verbose=verbose, escalate=escalate)
+
+        source_lock = asyncio.Lock()
+
+        async def next_gid(gid_iter) -> Optional[str]:
+            # One reader at a time: an async generator cannot be advanced concurrently
+            async with source_lock:
                 try:
-                    if verbose:
-                        print(f"🧭 Fetching GID {gid}…", flush=True)
-                    rec = await self.scrape_one(gid, headless=headless, verbose=verbose)
-                    results.append(rec)
-                except Exception as e:
-                    if verbose:
-                        print(f"❌ Error scraping {gid}: {e}", flush=True)
+                    return await gid_iter.__anext__() if hasattr(gid_iter, "__anext__") else next(gid_iter)
+                except (StopIteration, StopAsyncIteration):
+                    return None
+
+        async def attempt(gid: str, escalate: bool):
+            """The record or ScrapeFailure to yield, or None when the GID was deferred."""
+            try:
+                return await scrape(gid, escalate)
+            except Exception as e:
+                reason = classify_failure(e)
+                if retry_failed and not escalate:
+                    self.dead_letters.add(gid, reason, e)
+                    self._count(f"deferred_{reason}")
+                    return None
+                return ScrapeFailure(gid=str(gid), error_type=type(e).__name__, error=str(e), reason=reason)
+
+        async def worker(gid_iter, escalate: bool):
+            while True:
+                if escalate or self.concurrency is None:
+                    gid = await next_gid(gid_iter)
+                    if gid is None:
+                        return
+                    item = await attempt(gid, escalate)
+                else:
+                    # Slot first, then the GID: idle workers above the current limit claim nothing
+                    async with self.concurrency.slot():
+                        gid = await next_gid(gid_iter)
+                        if gid is None:
+                            return
+                        item = await attempt(gid, escalate)
+                if item is not None:
+                    await out.put(item)
 
+        async def run_passes():
+            main_iter = gids.__aiter__() if hasattr(gids, "__aiter__") else iter(gids)
+            await asyncio.gather(*(worker(main_iter, False) for _ in range(n_workers)))
+            letters = self.dead_letters.drain()
+            if letters:
+                current = self.concurrency.limit if self.concurrency is not None else max_concurrency
+                retry_workers = max(1, min(len(letters), current // 2))
+                if verbose:
+                    print(f"🔁 Retrying {len(letters)} deferred GIDs with {retry_workers} workers…", flush=True)
+                retry_iter = iter([d.gid for d in letters])
+                await asyncio.gather(*(worker(retry_iter, True) for _ in range(retry_workers)))
+            await out.put(done)
+
+        producer = asyncio.create_task(run_passes())
         try:
-            await asyncio.gather(*(bound_scrape(g) for g in gids))
+            while True:
+                item = await out.get()
+                if item is done:
+                    break
+                yield item
         finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
             await self._close()
+
+    async def scrape_many_parallel(self, gids: List[str], max_concurrency: int = 4, headless: bool = True, verbose: bool = True) -> List[ParallelScrapedProjectRecord]:
+        results: List[ParallelScrapedProjectRecord] = []
+        async for item in self.iter_scrape(gids, max_concurrency=max_concurrency, headless=headless, verbose=verbose):
+            if isinstance(item, ScrapeFailure):
+                if verbose:
+                    print(f"❌ Error scraping {item.gid} ({item.reason}): {item.error}", flush=True)
+                continue
+            results.append(item)
+        if verbose:
+            print(f"📊 Scrape paths: {self.get_stats()}", flush=True)
         return results
 
+    def scrape_many_sharded(self, gids: List[str], processes: Optional[int] = None, max_concurrency: int = 4,
+                            headless: bool = True, verbose: bool = True) -> List[ParallelScrapedProjectRecord]:
+        """
+        Scrape across N worker processes, each with its own event loop and Chromium, so
+        parsing and driver IPC are not confined to one core. GIDs are handed out through
+        a shared work queue (fast shards take more); records come back in input order.
+        """
+        processes = processes or int(os.getenv('SCRAPER_PROCESSES', '0')) or (os.cpu_count() or 1)
+        unique = list(dict.fromkeys(str(g) for g in gids))
+        processes = max(1, min(processes, len(unique)))
+        if not unique:
+            return []
+
+        ctx = mp.get_context("spawn")
+        task_q = ctx.Queue()
+        result_q = ctx.Queue()
+        for gid in unique:
+            task_q.put(gid)
+        for _ in range(processes):
+            task_q.put(None)
+
+        options = {
+            "goto_timeout_ms": self.goto_timeout_ms,
+            "use_cache": self.cache is not None,
+            "http_fast_path": self.http_fast_path,
+            "max_concurrency": max_concurrency,
+            "headless": headless,
+            "verbose": verbose,
+        }
+        workers = [ctx.Process(target=_shard_main, args=(i, task_q, result_q, options), daemon=True)
+                   for i in range(processes)]
+        for w in workers:
+            w.start()
+
+        records: Dict[str, ParallelScrapedProjectRecord] = {}
+        finished = 0
+        while finished < processes:
+            try:
+                kind, payload = result_q.get(timeout=5)
+            except queue.Empty:
+                if not any(w.is_alive() for w in workers):
+                    break
+                continue
+            if kind == "record":
+                records[payload["gid"]] = ParallelScrapedProjectRecord(**payload)
+            elif kind == "failure":
+                if verbose:
+                    print(f"❌ Error scraping {payload['gid']} ({payload['reason']}): {payload['error']}", flush=True)
+            elif kind == "done":
+                finished += 1
+                for name, value in payload.items():
+                    self._stats[name] = self._stats.get(name, 0) + value
+        for w in workers:
+            w.join(timeout=10)
+        if verbose:
+            print(f"📊 Sharded scrape ({processes} processes): {len(records)}/{len(unique)} ok, paths {self.get_stats()}", flush=True)
+        return [records[g] for g in unique if g in records]
+
     def _to_proper_case(self, s: str) -> str:
         try:
             return ' '.join(part.capitalize() for part in s.split())
@@ -567,3 +1284,33 @@ class PlaywrightParallelScraper:
             return s
 
 
+async def _shard_gids(task_q) -> AsyncIterator[str]:
+    while True:
+        # Blocking read off the event loop, so in-flight pages keep running meanwhile
+        gid = await asyncio.to_thread(task_q.get)
+        if gid is None:
+            return
+        yield gid
+
+
+def _shard_main(shard: int, task_q, result_q, options: Dict[str, Any]) -> None:
+    """Worker process entry point for PlaywrightParallelScraper.scrape_many_sharded."""
+    scraper = PlaywrightParallelScraper(
+        goto_timeout_ms=options["goto_timeout_ms"],
+        use_cache=options["use_cache"],
+        http_fast_path=options["http_fast_path"],
+    )
+
+    async def run() -> None:
+        async for item in scraper.iter_scrape(
+            _shard_gids(task_q),
+            max_concurrency=options["max_concurrency"],
+            headless=options["headless"],
+            verbose=options["verbose"],
+        ):
+            result_q.put(("failure" if isinstance(item, ScrapeFailure) else "record", asdict(item)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        result_q.put(("done", scraper._stats))
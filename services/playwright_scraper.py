@@ -13,6 +13,13 @@ from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup
 
+from services.html_tables import company_projects
+from services.browser_pool import PagePool, make_route_handler, blocking_policies
+from services.asset_cache import (
+    AssetCache, TransferMeter, asset_cache_enabled, storage_state_kwargs, save_storage_state,
+)
+from services.browser_server import launch_browser, release_browser
+
 
 BASE_HOST = "https://mininghub.com"
 
@@ -61,6 +68,19 @@ class PlaywrightScraper:
     def __init__(self, goto_timeout_ms: int = 25000, map_ready_timeout_ms: int = 7000):
         self.goto_timeout_ms = goto_timeout_ms
         self.map_ready_timeout_ms = map_ready_timeout_ms
+        # Navigations per pooled page before it is closed and replaced
+        self.page_max_uses = int(os.getenv('SCRAPER_PAGE_MAX_USES', '25'))
+        self._pool: Optional[PagePool] = None
+        # Static JS/CSS served from disk/memory via route.fulfill; bytes per page metered
+        self.asset_cache: Optional[AssetCache] = AssetCache() if asset_cache_enabled() else None
+        self.transfer = TransferMeter(self.asset_cache)
+        # Project/company pages and /map pages share a context; the policy follows the page URL
+        self.blocking = blocking_policies()
+        self._pages_loaded = 0
+        # In-run cache of parsed company pages: company URL -> projects table rows
+        self._company_cache: Dict[str, Dict[str, Any]] = {}
+        self._company_pages_fetched = 0
+        self._company_cache_hits = 0
 
         # Geocoding service (sync)
         try:
@@ -72,47 +92,42 @@ class PlaywrightScraper:
     async def _launch(self, headless: bool = True):
         from playwright.async_api import async_playwright
         self._pw = await async_playwright().start()
-        self._browser = await self._pw.chromium.launch(headless=headless, args=["--no-sandbox", "--disable-gpu"])
-        self._context = await self._browser.new_context(viewport={"width": 1280, "height": 900})
+        # Own Chromium, or an isolated context on the shared browser server
+        self._browser, self._browser_shared = await launch_browser(self._pw, headless=headless)
+        self._context = await self._browser.new_context(viewport={"width": 1280, "height": 900}, **storage_state_kwargs())
+        self.transfer.attach(self._context)
+        # Routing is registered once for the whole context, not per page
+        await self._context.route("**/*", make_route_handler(self.blocking, self.asset_cache))
+        self._pool = PagePool(self._context, max_uses=self.page_max_uses)
 
     async def _close(self):
+        if self._pool is not None:
+            self._pages_loaded += self._pool.get_stats()["leases"]
+            await self._pool.close()
+            self._pool = None
+        await save_storage_state(self._context)
         try:
             await self._context.close()
         except Exception:
             pass
-        try:
-            await self._browser.close()
-        except Exception:
-            pass
+        await release_browser(self._browser, self._browser_shared)
         try:
             await self._pw.stop()
         except Exception:
             pass
 
     async def _fetch_page_html(self, url: str, wait_selectors: Optional[List[str]] = None, wait_ms: int = 2000) -> str:
-        page = await self._context.new_page()
-
-        async def route_blocker(route):
-            rt = route.request.resource_type
-            u = route.request.url
-            if rt in {"image", "media", "font"}:
-                return await route.abort()
-            if any(s in u for s in ["/tile/", "/tiles/", "/{z}/", "/wmts", "/arcgis/", "/basemaps/", "/mapbox/"]):
-                return await route.abort()
-            return await route.continue_()
-        await page.route("**/*", route_blocker)
-
-        await page.goto(url, wait_until="domcontentloaded", timeout=min(self.goto_timeout_ms, 12000))
-        # Try short waits for expected selectors so dynamic content can settle
-        if wait_selectors:
-            for sel in wait_selectors:
-                try:
-                    await page.wait_for_selector(sel, timeout=wait_ms)
-                except Exception:
-                    pass
-        html = await page.content()
-        await page.close()
-        return html
+        async with self._pool.lease() as lease:
+            page = lease.page
+            await page.goto(url, wait_until="domcontentloaded", timeout=min(self.goto_timeout_ms, 12000))
+            # Try short waits for expected selectors so dynamic content can settle
+            if wait_selectors:
+                for sel in wait_selectors:
+                    try:
+                        await page.wait_for_selector(sel, timeout=wait_ms)
+                    except Exception:
+                        pass
+            return await page.content()
 
     async def _fetch_project_basics(self, gid: str) -> Dict[str, Any]:
         """Fetch project page and parse project title, company link/name from right-sider."""
@@ -203,71 +218,35 @@ class PlaywrightScraper:
             "company_link_found": company_link_found,
         }
 
-    def _parse_company_projects_table(self, company_html: str, target_gid: str, target_project_name: Optional[str]):
-        soup = BeautifulSoup(company_html, "html.parser")
-
-        # Find the right table
-        table = soup.find("div", {"class": "properties-wrapper-table"})
-
-        for t in soup.find_all("table", {"class": "properties-wrapper-table"}):
-            header_row = t.find("tr")
-            if not header_row:
-                continue
-            headers = [c.get_text(strip=True).lower() for c in header_row.find_all(["td", "th"])]
-            header_str = ",".join(headers)
-            if "project" in header_str and "commodit" in header_str and "stage" in header_str:
-                table = t
-                break
-        if not table:
+    def _company_project_rows(self, company_html: str) -> Dict[str, Any]:
+        """Parse every row of the company's projects table (gid, name, commodities, stage, summary link)."""
+        return company_projects(company_html)
+
+    @staticmethod
+    def _match_company_project(company: Dict[str, Any], target_gid: str, target_project_name: Optional[str]) -> Dict[str, Any]:
+        """Pick the row for one project: exact gid match first, else the last row with the same name."""
+        if company.get("table_html") is None:
             return {"commodities": None, "stage": None, "table_html": None, "matched_by": None, "project_summary_href": None}
 
         def normalize_name(s: str) -> str:
             return " ".join((s or "").strip().lower().split())
 
         target_name_norm = normalize_name(target_project_name) if target_project_name else None
-
-        rows = table.find_all("tr")
         best = {"commodities": None, "stage": None, "project_summary_href": None, "matched_by": None}
 
-        for tr in rows[1:]:  # skip header
-            tds = tr.find_all("td")
-            if len(tds) < 4:
-                continue
-
-            project_cell, _, commodities_cell, stage_cell, *rest = tds
-            link_cell = rest[0] if rest else None
-
-            # Try link gid match
-            link_gid = None
-            if link_cell:
-                a = link_cell.find("a", href=True)
-                if a and "project-profile?gid=" in a["href"]:
-                    link_gid = a["href"].split("project-profile?gid=")[1].split("&")[0]
-
-            if link_gid and str(link_gid) == str(target_gid):
-                return {
-                    "commodities": commodities_cell.get_text(strip=True) or None,
-                    "stage": stage_cell.get_text(strip=True) or None,
-                    "project_summary_href": a["href"] if a else None,
-                    "matched_by": "gid",
-                    "table_html": str(table)
-                }
-
-            # Fallback to name match
-            project_name_text = project_cell.get_text(" ", strip=True)
-            if target_name_norm and normalize_name(project_name_text) == target_name_norm:
-                best = {
-                    "commodities": commodities_cell.get_text(strip=True) or None,
-                    "stage": stage_cell.get_text(strip=True) or None,
-                    "project_summary_href": a["href"] if link_cell and (a := link_cell.find("a", href=True)) else None,
-                    "matched_by": "name",
-                    "table_html": str(table)
-                }
+        for row in company["rows"]:
+            fields = {k: row[k] for k in ("commodities", "stage", "project_summary_href")}
+            if row["gid"] and str(row["gid"]) == str(target_gid):
+                return {**fields, "matched_by": "gid", "table_html": company["table_html"]}
+            if target_name_norm and normalize_name(row["name"]) == target_name_norm:
+                best = {**fields, "matched_by": "name"}
 
-        if "table_html" not in best:
-            best["table_html"] = str(table)
+        best["table_html"] = company["table_html"]
         return best
 
+    def _parse_company_projects_table(self, company_html: str, target_gid: str, target_project_name: Optional[str]):
+        return self._match_company_project(self._company_project_rows(company_html), target_gid, target_project_name)
+
     async def _fetch_company_profile_html(self, company_url: str) -> str:
         return await self._fetch_page_html(
             company_url,
@@ -275,26 +254,48 @@ class PlaywrightScraper:
             wait_ms=2000
         )
 
+    async def _company_projects(self, company_url: str) -> Dict[str, Any]:
+        """Parsed projects table of a company page, fetched at most once per run."""
+        key = company_url.split("#")[0]
+        cached = self._company_cache.get(key)
+        if cached is not None:
+            self._company_cache_hits += 1
+            return cached
+        company = self._company_project_rows(await self._fetch_company_profile_html(company_url))
+        self._company_pages_fetched += 1
+        self._company_cache[key] = company
+        return company
+
+    def _apply_company_row(self, rec: ScrapedProjectRecord, company: Dict[str, Any]) -> None:
+        props = self._match_company_project(company, target_gid=rec.gid, target_project_name=rec.project_name)
+        rec.commodities = props.get('commodities')
+        rec.stage = props.get('stage')
+        rec.project_summary_href = urljoin(BASE_HOST, props.get('project_summary_href') or "") if props.get('project_summary_href') else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._company_pages_fetched + self._company_cache_hits
+        return {
+            "company_pages_fetched": self._company_pages_fetched,
+            "company_cache_hits": self._company_cache_hits,
+            "company_cache_hit_rate": (self._company_cache_hits / lookups) if lookups else 0.0,
+            **self.transfer.get_stats(pages=self._pages_loaded + (self._pool.get_stats()["leases"] if self._pool else 0)),
+            "request_blocking": {kind: policy.get_stats() for kind, policy in self.blocking.items()},
+        }
+
     async def _fetch_map_center(self, gid: str) -> Dict[str, Any]:
         """Fetch map center from /map?gid= using Playwright and robust map ready waits."""
-        from playwright.async_api import TimeoutError as PWTimeout
-        page = await self._context.new_page()
-
-        async def route_blocker(route):
-            rt = route.request.resource_type
-            u = route.request.url
-            if rt in {"image", "media", "font"}:
-                return await route.abort()
-            if any(s in u for s in ["/tile/", "/tiles/", "/{z}/", "/wmts", "/arcgis/", "/basemaps/", "/mapbox/"]):
-                return await route.abort()
-            return await route.continue_()
-        await page.route("**/*", route_blocker)
-
         url = urljoin(BASE_HOST, f"/map?gid={gid}")
+        async with self._pool.lease() as lease:
+            return await self._read_map_center(lease, url)
+
+    async def _read_map_center(self, lease, url: str) -> Dict[str, Any]:
+        from playwright.async_api import TimeoutError as PWTimeout
+        page = lease.page
         try:
             await page.goto(url, wait_until="domcontentloaded", timeout=self.goto_timeout_ms)
         except PWTimeout:
-            await page.close()
+            # Possibly wedged mid-navigation; don't hand it to the next caller
+            lease.broken = True
             return {"status": "timeout", "url": url}
 
         # Wait for map object presence
@@ -357,13 +358,8 @@ class PlaywrightScraper:
         try:
             center = await page.evaluate(RUNTIME_JS_ASYNC)
         except Exception:
-            await page.close()
+            lease.broken = True
             return {"status": "eval_error", "url": url}
-        finally:
-            try:
-                await page.close()
-            except Exception:
-                pass
 
         if center:
             return {"status": "ok", **center, "url": url}
@@ -406,8 +402,8 @@ class PlaywrightScraper:
 
             # Company profile table parsing to get commodities/stage
             if rec.company_url:
-                company_html = await self._fetch_company_profile_html(rec.company_url)
-                props = self._parse_company_projects_table(company_html, target_gid=gid, target_project_name=rec.project_name)
+                company = await self._company_projects(rec.company_url)
+                props = self._match_company_project(company, target_gid=gid, target_project_name=rec.project_name)
                 rec.commodities = props.get('commodities')
                 rec.stage = props.get('stage')
                 rec.project_summary_href = props.get('project_summary_href')
@@ -432,8 +428,107 @@ class PlaywrightScraper:
     def to_dict(rec: ScrapedProjectRecord) -> Dict[str, Any]:
         return asdict(rec)
 
-    async def scrape_many(self, gids: List[str], headless: bool = True, verbose: bool = True) -> List[ScrapedProjectRecord]:
-        """Scrape multiple project pages using a single browser session for speed."""
+    async def _scrape_basics(self, gid: str) -> ScrapedProjectRecord:
+        basics = await self._fetch_project_basics(gid)
+        return ScrapedProjectRecord(
+            gid=str(gid),
+            project_name=basics.get('project_name'),
+            company_id=basics.get('company_id'),
+            company_name=basics.get('company_name'),
+            company_url=basics.get('company_url'),
+            project_url=basics.get('url'),
+            company_profile_link_found=bool(basics.get('company_link_found')),
+        )
+
+    async def _finish_record(self, rec: ScrapedProjectRecord, tag: str, verbose: bool) -> ScrapedProjectRecord:
+        """Map center (5s cap) and reverse geocoding for a record whose page data is already filled."""
+        if verbose:
+            print(f"{tag} 🗺️ Fetching map center… (5s max)", flush=True)
+        try:
+            m = await asyncio.wait_for(self._fetch_map_center(rec.gid), timeout=5.0)
+        except asyncio.TimeoutError:
+            m = {"status": "timeout_overall"}
+        if m.get('status') == 'ok':
+            rec.latitude = float(m.get('lat')) if m.get('lat') is not None else None
+            rec.longitude = float(m.get('lng')) if m.get('lng') is not None else None
+            rec.map_zoom = m.get('zoom')
+            rec.map_lib = m.get('lib')
+            rec.location_source = 'scraper_map'
+        else:
+            if verbose:
+                print(f"{tag} ⚠️ Map center status: {m.get('status')}", flush=True)
+
+        if verbose and rec.latitude is not None and rec.longitude is not None:
+            print(f"{tag} 🌍 Reverse geocoding lat={rec.latitude:.6f}, lon={rec.longitude:.6f}…", flush=True)
+        rec = self._geocode_if_possible(rec)
+
+        if verbose:
+            print(f"{tag} ✅ Done: project='{rec.project_name or ''}', company='{rec.company_name or ''}', stage='{rec.stage or ''}', commodities='{rec.commodities or ''}'", flush=True)
+        return rec
+
+    async def scrape_many(self, gids: List[str], headless: bool = True, verbose: bool = True,
+                          group_by_company: Optional[bool] = None) -> List[ScrapedProjectRecord]:
+        """
+        Scrape multiple project pages using a single browser session for speed.
+
+        With group_by_company (default, SCRAPER_GROUP_BY_COMPANY) all project pages are read
+        first, GIDs are grouped by company URL and each company profile is loaded once to fill
+        stage/commodities/summary link for every GID in its projects table. Otherwise projects
+        are scraped one by one; company pages still come from the in-run cache.
+        """
+        if group_by_company is None:
+            group_by_company = os.getenv('SCRAPER_GROUP_BY_COMPANY', 'true').lower() == 'true'
+        # Company pages are cached for this run only
+        self._company_cache.clear()
+        if not group_by_company:
+            return await self._scrape_many_sequential(gids, headless=headless, verbose=verbose)
+
+        await self._launch(headless=headless)
+        records: Dict[int, ScrapedProjectRecord] = {}
+        try:
+            total = len(gids)
+            by_company: Dict[str, List[int]] = {}
+            for idx, gid in enumerate(gids, 1):
+                try:
+                    if verbose:
+                        print(f"[{idx}/{total}] 🧭 Fetching basics for GID {gid}…", flush=True)
+                    rec = await self._scrape_basics(str(gid))
+                    records[idx] = rec
+                    if rec.company_url:
+                        by_company.setdefault(rec.company_url.split("#")[0], []).append(idx)
+                    elif verbose:
+                        print(f"[{idx}/{total}] ⚠️ No company profile link found on project page.", flush=True)
+                except Exception as e:
+                    if verbose:
+                        print(f"[{idx}/{total}] ❌ Error scraping {gid}: {e}", flush=True)
+
+            for c_idx, (company_url, members) in enumerate(by_company.items(), 1):
+                if verbose:
+                    print(f"[company {c_idx}/{len(by_company)}] 🏢 Loading company profile for {len(members)} project(s)…", flush=True)
+                try:
+                    company = await self._company_projects(company_url)
+                except Exception as e:
+                    if verbose:
+                        print(f"[company {c_idx}/{len(by_company)}] ⚠️ Company profile failed: {e}", flush=True)
+                    continue
+                for idx in members:
+                    self._apply_company_row(records[idx], company)
+
+            for idx in sorted(records):
+                try:
+                    records[idx] = await self._finish_record(records[idx], f"[{idx}/{total}]", verbose)
+                except Exception as e:
+                    if verbose:
+                        print(f"[{idx}/{total}] ❌ Error scraping {records[idx].gid}: {e}", flush=True)
+                    records.pop(idx)
+            if verbose:
+                stats = self.get_stats()
+                print(f"🏢 Company pages: {stats['company_pages_fetched']} fetched for {len(records)} projects", flush=True)
+        finally:
+            await self._close()
+        return [records[idx] for idx in sorted(records)]
+
+    async def _scrape_many_sequential(self, gids: List[str], headless: bool = True, verbose: bool = True) -> List[ScrapedProjectRecord]:
         await self._launch(headless=headless)
         results: List[ScrapedProjectRecord] = []
         try:
@@ -442,58 +537,20 @@ class PlaywrightScraper:
                 try:
                     if verbose:
                         print(f"[{idx}/{total}] 🧭 Fetching basics for GID {gid}…", flush=True)
-                    basics = await self._fetch_project_basics(gid)
-                    rec = ScrapedProjectRecord(
-                        gid=str(gid),
-                        project_name=basics.get('project_name'),
-                        company_id=basics.get('company_id'),
-                        company_name=basics.get('company_name'),
-                        company_url=basics.get('company_url'),
-                        project_url=basics.get('url'),
-                        company_profile_link_found=bool(basics.get('company_link_found')),
-                    )
+                    rec = await self._scrape_basics(str(gid))
 
                     if rec.company_url:
                         if verbose:
                             print(f"[{idx}/{total}] 🏢 Loading company profile to match project row…", flush=True)
-                        company_html = await self._fetch_company_profile_html(rec.company_url)
-                        props = self._parse_company_projects_table(company_html, target_gid=str(gid), target_project_name=rec.project_name)
-                        rec.commodities = props.get('commodities')
-                        rec.stage = props.get('stage')
-                        rec.project_summary_href = urljoin(BASE_HOST, props.get('project_summary_href') or "") if props.get('project_summary_href') else None
+                        self._apply_company_row(rec, await self._company_projects(rec.company_url))
                     else:
                         if verbose:
                             print(f"[{idx}/{total}] ⚠️ No company profile link found on project page.", flush=True)
 
-                    if verbose:
-                        print(f"[{idx}/{total}] 🗺️ Fetching map center… (5s max)", flush=True)
-                    try:
-                        m = await asyncio.wait_for(self._fetch_map_center(str(gid)), timeout=5.0)
-                    except asyncio.TimeoutError:
-                        m = {"status": "timeout_overall"}
-                    if m.get('status') == 'ok':
-                        rec.latitude = float(m.get('lat')) if m.get('lat') is not None else None
-                        rec.longitude = float(m.get('lng')) if m.get('lng') is not None else None
-                        rec.map_zoom = m.get('zoom')
-                        rec.map_lib = m.get('lib')
-                        rec.location_source = 'scraper_map'
-                    else:
-                        if verbose:
-                            print(f"[{idx}/{total}] ⚠️ Map center status: {m.get('status')}", flush=True)
-
-                    if verbose and rec.latitude is not None and rec.longitude is not None:
-                        print(f"[{idx}/{total}] 🌍 Reverse geocoding lat={rec.latitude:.6f}, lon={rec.longitude:.6f}…", flush=True)
-                    rec = self._geocode_if_possible(rec)
-
-                    if verbose:
-                        print(f"[{idx}/{total}] ✅ Done: project='{rec.project_name or ''}', company='{rec.company_name or ''}', stage='{rec.stage or ''}', commodities='{rec.commodities or ''}'", flush=True)
-
-                    results.append(rec)
+                    results.append(await self._finish_record(rec, f"[{idx}/{total}]", verbose))
                 except Exception as e:
                     if verbose:
                         print(f"[{idx}/{total}] ❌ Error scraping {gid}: {e}", flush=True)
         finally:
             await self._close()
         return results
-
-